@@ -4,12 +4,17 @@ from discord.ext import commands
 from discord.ui import Button, View, Modal, TextInput
 import datetime
 import yaml
-from modules.verification import init_db, get_config, set_config, get_user_verification, add_user_verification, async_session, Verification, Config
+from modules.verification import init_db, get_config, get_all_configs, set_config, get_user_verification, add_user_verification, clear_user_verification, is_user_verified, load_config_cache, config_cache, load_verified_users, verified_users, start_legacy_backfill, record_verification_message, get_verification_messages, delete_verification_messages
 from modules.logging import log_verification
-from modules.selfroles_db import selfrole_session, SelfRoleConfig, init_selfrole_db
-from modules.selfroles import SelfRolesView
-from modules.moderation_db import init_moderation_db, get_moderation_config, set_moderation_log_channel
-from sqlalchemy.future import select
+from modules.log_dispatcher import log_dispatcher
+from modules.role_mutations import role_mutations
+from modules.message_refresher import refresh_messages
+from modules.selfroles_db import init_selfrole_db, selfrole_config_cache, selfrole_roles_cache, resolved_selfrole_cache, selfrole_usage
+from modules.selfroles import selfrole_latency
+from modules.startup import readiness
+from modules.moderation_db import init_moderation_db, get_moderation_config, set_moderation_log_channel, load_moderation_config_cache, moderation_config_cache, load_escalation_cache, escalation_cache
+from modules.escalation import escalation_executor
+from modules.database import instrumentation
 from discord import app_commands
 import json
 import os
@@ -117,8 +122,12 @@ class VerificationModal(Modal):
                 )
                 return
 
+            # The role edit can wait on the coalescing window, other edits in the
+            # guild and rate limits, so acknowledge within the 3-second window first
+            await interaction.response.defer(ephemeral=True, thinking=True)
+
             # Add the user to the verification database
-            await add_user_verification(str(interaction.user.id), interaction.user.name, birthdate=birthdate)
+            await add_user_verification(interaction.guild.id, interaction.user.id, interaction.user.name, birthdate=birthdate)
 
             # Track role assignment status
             role_assigned = False
@@ -130,7 +139,7 @@ class VerificationModal(Modal):
                 verified_role = interaction.guild.get_role(config.verified_role_id)
                 if verified_role:
                     try:
-                        await interaction.user.add_roles(verified_role)
+                        await role_mutations.apply(interaction.user, add=[verified_role])
                         role_assigned = True
                     except discord.Forbidden:
                         role_error = "Bot missing permissions to assign role"
@@ -166,7 +175,7 @@ class VerificationModal(Modal):
                     description=f"Your age was verified, but role assignment failed.\n\n**Issue:** {role_error}\n\nPlease contact a server administrator.",
                     color=discord.Color.orange(),
                 )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            await interaction.followup.send(embed=embed, ephemeral=True)
 
             # Log the verification event
             embed = discord.Embed(
@@ -195,7 +204,10 @@ class VerificationModal(Modal):
                 description="Verification failed.",
                 color=discord.Color.red(),
             )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            if interaction.response.is_done():
+                await interaction.followup.send(embed=embed, ephemeral=True)
+            else:
+                await interaction.response.send_message(embed=embed, ephemeral=True)
 
 class DynamicVerificationButton(Button):
     def __init__(self, label: str, style: discord.ButtonStyle, custom_id: str):
@@ -222,9 +234,8 @@ class DynamicVerificationButton(Button):
                 await interaction.response.send_message(embed=embed, ephemeral=True)
                 return
 
-            # Check if user is already verified
-            existing_user = await get_user_verification(str(interaction.user.id))
-            if existing_user:
+            # Check if user is already verified (served from memory)
+            if await is_user_verified(interaction.guild.id, interaction.user.id):
                 embed = discord.Embed(
                     title="Notice",
                     description="Already verified.",
@@ -249,15 +260,96 @@ class DynamicVerificationView(View):
         super().__init__(timeout=None)  # Persistent views must have no timeout
         self.add_item(DynamicVerificationButton(label=label, style=style, custom_id=custom_id))
 
+def register_verification_view(guild_id: int):
+    """Register the persistent verification view for a guild, once."""
+    custom_id = f"verify_button_{guild_id}"
+    view = dynamic_views.get(custom_id)
+    if view is None:
+        view = DynamicVerificationView(label="Verify", style=discord.ButtonStyle.green, custom_id=custom_id)
+        bot.add_view(view)  # Register the persistent view
+        dynamic_views[custom_id] = view  # Track the view globally
+    return view
+
+async def build_verification_message(guild_id: int):
+    """Build the embed and view of a guild's verification message."""
+    embed = discord.Embed(
+        title="Age Verification",
+        description="Verify your age to access this server.",
+        color=discord.Color.blue(),
+    )
+    embed.add_field(
+        name="Instructions",
+        value="Please verify with the button below"
+    )
+    config = await get_config(guild_id)
+    if config and config.verified_role_id:
+        embed.add_field(name="Role", value=f"<@&{config.verified_role_id}>")
+
+    # Use the existing view or create and register a new one
+    return embed, register_verification_view(guild_id)
+
+async def refresh_verification_messages(guild_id: int):
+    """Edit the posted verification messages of a guild to match its configuration."""
+    messages = await get_verification_messages(guild_id)
+    if not messages:
+        return
+
+    async def build(channel):
+        return await build_verification_message(guild_id)
+
+    results = await refresh_messages(bot, messages.items(), build)
+    if results["missing"]:
+        # Deleted messages are forgotten rather than re-posted
+        await delete_verification_messages(guild_id, [channel_id for channel_id, _ in results["missing"]])
+    print(f"Verification messages refreshed for guild {guild_id}: {results['edited']} edited, {len(results['missing'])} gone")
+
+# Background refreshes still in progress, kept referenced until done
+refresh_tasks = set()
+# Guild ID -> whether another refresh was requested while one runs
+refreshing_guilds = {}
+
+def schedule_verification_refresh(guild_id: int):
+    """Refresh the posted verification messages of a guild in the background, once at a time per guild."""
+    if guild_id in refreshing_guilds:
+        refreshing_guilds[guild_id] = True  # Run again once the current refresh ends
+        return
+    refreshing_guilds[guild_id] = False
+    task = asyncio.create_task(run_verification_refresh(guild_id))
+    refresh_tasks.add(task)
+    task.add_done_callback(refresh_tasks.discard)
+
+async def run_verification_refresh(guild_id: int):
+    try:
+        while True:
+            await refresh_verification_messages(guild_id)
+            if not refreshing_guilds[guild_id]:
+                break
+            refreshing_guilds[guild_id] = False
+    except Exception as e:
+        print(f"Failed to refresh verification messages for guild {guild_id}: {e}")
+    finally:
+        del refreshing_guilds[guild_id]
+
 class ConfigCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        readiness.add_phase("restart_message", self.confirm_restart)
+        readiness.add_phase("verification_views", self.register_verification_views)
         print("ConfigCommands cog loaded.")
 
     @commands.Cog.listener()
-    @bot.event
     async def on_ready(self):
         print(f"Logged in as {bot.user}")
+        # Heavy startup work only runs on the first ready of the process,
+        # later readies after a reconnect are only counted
+        await readiness.on_ready()
+
+    @commands.Cog.listener()
+    async def on_resumed(self):
+        readiness.on_resumed()
+
+    async def confirm_restart(self):
+        """Edit the stored restart message, if any, to confirm the restart."""
         # Check if there is a stored restart message
         try:
             with open("restart_message.json", "r") as file:
@@ -291,55 +383,15 @@ class ConfigCommands(commands.Cog):
         except Exception as e:
             print(f"An unexpected error occurred: {e}")
 
-        await init_db()  # Initialize the database
-
-        # Fetch the current configuration for all guilds
-        async with async_session() as session:
-            result = await session.execute(select(Config))
-            configs = result.scalars().all()
-
-        # Register a persistent view for each guild
-        for config in configs:
-            custom_id = f"verify_button_{config.guild_id}"
+    async def register_verification_views(self):
+        """Register a persistent verification view for every configured guild."""
+        # Configs were bulk-loaded into the cache at startup, so this reads no rows
+        registered = 0
+        for config in get_all_configs():
             if config.verification_channel_id:
-                view = DynamicVerificationView(label="Verify", style=discord.ButtonStyle.green, custom_id=custom_id)
-                self.bot.add_view(view)  # Register the persistent view
-                dynamic_views[custom_id] = view  # Track the view globally
-                print(f"Registered persistent view for guild {config.guild_id} with custom_id {custom_id}")
-            else:
-                print(f"Skipping guild {config.guild_id}: verification_channel_id is not set.")
-        print("Dynamic persistent verification views registered.")
-
-        # Fetch all self-role configurations and register persistent views
-        async with selfrole_session() as session:
-            result = await session.execute(select(SelfRoleConfig))
-            configs = result.scalars().all()
-
-        for config in configs:
-            guild = bot.get_guild(config.guild_id)
-            if not guild:
-                print(f"Skipping self-role config for guild {config.guild_id}: guild not found")
-                continue
-                
-            roles_and_labels = json.loads(config.roles_and_labels)
-            roles_and_labels_parsed = []
-            
-            for role_id, label in roles_and_labels.items():
-                role = guild.get_role(int(role_id))
-                if role:
-                    roles_and_labels_parsed.append((role, label))
-                else:
-                    print(f"Skipping role {role_id} in guild {config.guild_id}: role not found")
-            
-            if roles_and_labels_parsed:
-                view = SelfRolesView(roles_and_labels_parsed)
-                bot.add_view(view)  # Register the persistent view globally
-            else:
-                print(f"Skipping self-role config {config.message_name} for guild {config.guild_id}: no valid roles")
-        print("Persistent self-role views registered.")
-
-        # Initialize the moderation database
-        await init_moderation_db()
+                register_verification_view(config.guild_id)
+                registered += 1
+        print(f"Dynamic persistent verification views registered for {registered} guilds.")
 
     @discord.app_commands.command(name="config", description="Configure server settings (verification and moderation).")
     @discord.app_commands.describe(
@@ -399,6 +451,11 @@ class ConfigCommands(commands.Cog):
                     value=f"<#{mod_config.log_channel_id}>" if mod_config.log_channel_id else "Not Set",
                     inline=True
                 )
+                embed.add_field(
+                    name="⏳ Warning Expiry",
+                    value=f"{mod_config.warning_ttl_days} days" if mod_config.warning_ttl_days else "Never",
+                    inline=True
+                )
             else:
                 embed.add_field(name="🛡️ Moderation", value="Not configured", inline=False)
             
@@ -423,16 +480,15 @@ class ConfigCommands(commands.Cog):
                 
                 if verification_channel:
                     updates.append(f"🔐 Verification Channel: {verification_channel.mention}")
-                    # Update verification button view
-                    custom_id = f"verify_button_{interaction.guild.id}"
-                    view = DynamicVerificationView(label="Verify", style=discord.ButtonStyle.green, custom_id=custom_id)
-                    dynamic_views[custom_id] = view
-                    self.bot.add_view(view)
+                    # Make sure the verification button view is registered
+                    register_verification_view(interaction.guild.id)
                 
                 if verification_log:
                     updates.append(f"📋 Verification Log: {verification_log.mention}")
                 if verified_role:
                     updates.append(f"✅ Verified Role: {verified_role.mention}")
+                    # Posted verification messages show the role, update them in place
+                    schedule_verification_refresh(interaction.guild.id)
         
         # Update moderation settings
         if moderation_log:
@@ -484,23 +540,11 @@ class ConfigCommands(commands.Cog):
             await interaction.followup.send(embed=embed, ephemeral=True)
             return
 
-        # Create an embed for the verification message
-        embed = discord.Embed(
-            title="Age Verification",
-            description="Verify your age to access this server.",
-            color=discord.Color.blue(),
-        )
-        embed.add_field(
-            name="Instructions",
-            value="Please verify with the button below"
-        )
-
-        # Use the existing view or create a new one
-        custom_id = f"verify_button_{interaction.guild.id}"
-        view = dynamic_views.get(custom_id) or DynamicVerificationView(label="Verify", style=discord.ButtonStyle.green, custom_id=custom_id)
-        dynamic_views[custom_id] = view  # Track the view globally
+        embed, view = await build_verification_message(interaction.guild.id)
 
-        await channel.send(embed=embed, view=view)
+        # Send the message and remember it, so configuration changes can update it
+        message = await channel.send(embed=embed, view=view)
+        await record_verification_message(interaction.guild.id, channel.id, message.id)
         embed = discord.Embed(
             title="Success",
             description="Verification button sent.",
@@ -515,69 +559,61 @@ class ConfigCommands(commands.Cog):
     async def clear_verification(self, interaction: discord.Interaction, user: discord.User):
         """Slash command to clear a user's verification record."""
         await interaction.response.defer(ephemeral=True)  # Defer the response to avoid timeouts
-        async with async_session() as session:
-            result = await session.execute(
-                select(Verification).where(Verification.user_id == str(user.id))
+        # Delete the verification record
+        if await clear_user_verification(interaction.guild.id, user.id):
+            # Remove the verified role
+            config = await get_config(interaction.guild.id)
+            role_removed = False
+            if config and config.verified_role_id:
+                verified_role = interaction.guild.get_role(config.verified_role_id)
+                if verified_role:
+                    member = interaction.guild.get_member(user.id)
+                    if member and verified_role in member.roles:
+                        try:
+                            await role_mutations.apply(member, remove=[verified_role])
+                            role_removed = True
+                        except discord.Forbidden:
+                            # Log the error but continue with the verification removal
+                            error_embed = discord.Embed(
+                                title="Error",
+                                description="Missing permissions to remove role.",
+                                color=discord.Color.red(),
+                            )
+                            await log_verification(interaction.client, interaction.guild.id, error_embed)
+
+            # Log the action (orange embed for the log channel)
+            log_embed = discord.Embed(
+                title="Verification Record Cleared",
+                description=f"Verification removed for {user.mention}",
+                color=discord.Color.orange(),  # Orange for the log channel
             )
-            verification = result.scalars().first()
-            if verification:
-                # Delete the verification record
-                await session.delete(verification)
-                await session.commit()
-
-                # Remove the verified role
-                config = await get_config(interaction.guild.id)
-                role_removed = False
-                if config and config.verified_role_id:
-                    verified_role = interaction.guild.get_role(config.verified_role_id)
-                    if verified_role:
-                        member = interaction.guild.get_member(user.id)
-                        if member and verified_role in member.roles:
-                            try:
-                                await member.remove_roles(verified_role)
-                                role_removed = True
-                            except discord.Forbidden:
-                                # Log the error but continue with the verification removal
-                                error_embed = discord.Embed(
-                                    title="Error",
-                                    description="Missing permissions to remove role.",
-                                    color=discord.Color.red(),
-                                )
-                                await log_verification(interaction.client, interaction.guild.id, error_embed)
-
-                # Log the action (orange embed for the log channel)
-                log_embed = discord.Embed(
-                    title="Verification Record Cleared",
-                    description=f"Verification removed for {user.mention}",
-                    color=discord.Color.orange(),  # Orange for the log channel
-                )
-                log_embed.add_field(name="User ID", value=user.id, inline=True)
-                log_embed.add_field(name="Username", value=user.name, inline=True)
-                log_embed.add_field(name="Cleared By", value=f"{interaction.user.mention}", inline=True)
-                log_embed.set_thumbnail(url=user.display_avatar.url)
-
-                # Log the action to the configured log channel
-                await log_verification(interaction.client, interaction.guild.id, log_embed)
-
-                # Send success response (green embed for the user)
-                response_embed = discord.Embed(
-                    title="Verification Record Cleared",
-                    description=f"Verification removed for {user.mention}",
-                    color=discord.Color.green(),  # Green for the user response
-                )
-                response_embed.add_field(name="User ID", value=user.id, inline=True)
-                response_embed.add_field(name="Username", value=user.name, inline=True)
-                response_embed.add_field(name="Verified Role Removed", value="Yes" if role_removed else "No", inline=True)
+            log_embed.add_field(name="User ID", value=user.id, inline=True)
+            log_embed.add_field(name="Username", value=user.name, inline=True)
+            log_embed.add_field(name="Cleared By", value=f"{interaction.user.mention}", inline=True)
+            log_embed.set_thumbnail(url=user.display_avatar.url)
+
+            # Log the action to the configured log channel
+            await log_verification(interaction.client, interaction.guild.id, log_embed)
+
+            # Send success response (green embed for the user)
+            response_embed = discord.Embed(
+                title="Verification Record Cleared",
+                description=f"Verification removed for {user.mention}",
+                color=discord.Color.green(),  # Green for the user response
+            )
+            response_embed.add_field(name="User ID", value=user.id, inline=True)
+            response_embed.add_field(name="Username", value=user.name, inline=True)
+            response_embed.add_field(name="Verified Role Removed", value="Yes" if role_removed else "No", inline=True)
 
-                await interaction.followup.send(embed=response_embed, ephemeral=True)
-            else:
-                # Handle the case where no verification record exists
-                embed = discord.Embed(
-                    title="No Verification Record Found",
-                    description=f"No verification record exists for {user.mention}.",
-                    color=discord.Color.red(),
-                )
-                await interaction.followup.send(embed=embed, ephemeral=True)
+            await interaction.followup.send(embed=response_embed, ephemeral=True)
+        else:
+            # Handle the case where no verification record exists
+            embed = discord.Embed(
+                title="No Verification Record Found",
+                description=f"No verification record exists for {user.mention}.",
+                color=discord.Color.red(),
+            )
+            await interaction.followup.send(embed=embed, ephemeral=True)
 
     @discord.app_commands.command(name="check_verification", description="Check the verification status of a user.")
     @discord.app_commands.describe(user="The user whose verification status you want to check.")
@@ -586,44 +622,40 @@ class ConfigCommands(commands.Cog):
     async def check_verification(self, interaction: discord.Interaction, user: discord.User):
         """Slash command to check the verification status of a user."""
         await interaction.response.defer(ephemeral=True)  # Defer the response to avoid timeouts
-        async with async_session() as session:
-            result = await session.execute(
-                select(Verification).where(Verification.user_id == str(user.id))
-            )
-            verification = result.scalars().first()
+        verification = await get_user_verification(interaction.guild.id, user.id)
 
-            if verification:
-                # Calculate the user's age
-                today = datetime.date.today()
-                age = today.year - verification.birthdate.year - (
-                    (today.month, today.day) < (verification.birthdate.month, verification.birthdate.day)
-                )
+        if verification:
+            # Calculate the user's age
+            today = datetime.date.today()
+            age = today.year - verification.birthdate.year - (
+                (today.month, today.day) < (verification.birthdate.month, verification.birthdate.day)
+            )
 
-                # Create an embed for the verification status
-                embed = discord.Embed(
-                    title="Verification Status",
-                    description=f"Verification details for {user.mention}",
-                    color=discord.Color.green(),
-                )
-                embed.add_field(name="User ID", value=user.id, inline=True)
-                embed.add_field(name="Username", value=verification.username, inline=True)
-                embed.add_field(name="Birthdate", value=verification.birthdate.strftime('%d-%m-%Y'), inline=True)
-                embed.add_field(name="Age", value=age, inline=True)
-                embed.set_thumbnail(url=user.display_avatar.url)
+            # Create an embed for the verification status
+            embed = discord.Embed(
+                title="Verification Status",
+                description=f"Verification details for {user.mention}",
+                color=discord.Color.green(),
+            )
+            embed.add_field(name="User ID", value=user.id, inline=True)
+            embed.add_field(name="Username", value=verification.username, inline=True)
+            embed.add_field(name="Birthdate", value=verification.birthdate.strftime('%d-%m-%Y'), inline=True)
+            embed.add_field(name="Age", value=age, inline=True)
+            embed.set_thumbnail(url=user.display_avatar.url)
 
-                await interaction.followup.send(embed=embed, ephemeral=True)
-            else:
-                # Create an embed for the "User Not Verified" response
-                embed = discord.Embed(
-                    title="Verification Status",
-                    description=f"{user.mention} has not completed the verification process.",
-                    color=discord.Color.orange(),
-                )
-                embed.add_field(name="User ID", value=user.id, inline=True)
-                embed.add_field(name="Username", value=user.name, inline=True)
-                embed.set_thumbnail(url=user.display_avatar.url)
+            await interaction.followup.send(embed=embed, ephemeral=True)
+        else:
+            # Create an embed for the "User Not Verified" response
+            embed = discord.Embed(
+                title="Verification Status",
+                description=f"{user.mention} has not completed the verification process.",
+                color=discord.Color.orange(),
+            )
+            embed.add_field(name="User ID", value=user.id, inline=True)
+            embed.add_field(name="Username", value=user.name, inline=True)
+            embed.set_thumbnail(url=user.display_avatar.url)
 
-                await interaction.followup.send(embed=embed, ephemeral=True)
+            await interaction.followup.send(embed=embed, ephemeral=True)
 
 @bot.command(name="sync", description="Sync slash commands to Discord globally.")
 @commands.is_owner()
@@ -649,6 +681,108 @@ async def ping(ctx):
     )
     await ctx.send(embed=embed)
 
+@bot.command(name="cachestats", description="Show config cache hit/miss counters.")
+@commands.is_owner()
+async def cache_stats(ctx):
+    """Show hit/miss counters for the guild config caches."""
+    embed = discord.Embed(
+        title="Config Cache",
+        color=discord.Color.blue(),
+    )
+    for cache in (config_cache, moderation_config_cache, escalation_cache, verified_users, selfrole_config_cache, selfrole_roles_cache, resolved_selfrole_cache):
+        stats = cache.stats()
+        embed.add_field(
+            name=stats["name"],
+            value=f"Entries: {stats['entries']}\nHits: {stats['hits']}\nMisses: {stats['misses']}\nHit rate: {stats['hit_rate']:.1%}",
+            inline=True,
+        )
+    await ctx.send(embed=embed)
+
+@bot.command(name="dbstats", description="Show or toggle database query instrumentation.")
+@commands.is_owner()
+async def db_stats(ctx, mode: str = None):
+    """Show query statistics, or switch instrumentation with 'on', 'off' or 'reset'."""
+    if mode:
+        mode = mode.lower()
+        if mode == "on":
+            instrumentation.enable()
+        elif mode == "off":
+            instrumentation.disable()
+        elif mode == "reset":
+            instrumentation.reset()
+        else:
+            embed = discord.Embed(
+                title="Invalid Argument",
+                description="Use `on`, `off` or `reset`, or leave it blank to show statistics.",
+                color=discord.Color.orange(),
+            )
+            await ctx.send(embed=embed)
+            return
+
+    embed = discord.Embed(
+        title="Database Instrumentation",
+        description=f"Status: {'enabled' if instrumentation.enabled else 'disabled'}\nSlow queries (>= {instrumentation.slow_query_ms:g}ms): {instrumentation.slow_queries}",
+        color=discord.Color.blue(),
+    )
+
+    call_sites = sorted(instrumentation.call_sites.items(), key=lambda item: item[1], reverse=True)[:10]
+    if call_sites:
+        embed.add_field(
+            name="Queries per call site",
+            value="\n".join(f"`{name}`: {count}" for name, count in call_sites),
+            inline=False,
+        )
+
+    statements = sorted(instrumentation.statements.items(), key=lambda item: item[1].total_ms, reverse=True)[:5]
+    for statement, histogram in statements:
+        embed.add_field(
+            name=statement[:250],
+            value=histogram.summary(),
+            inline=False,
+        )
+    await ctx.send(embed=embed)
+
+@bot.command(name="readystats", description="Show gateway ready and reconnect counters.")
+@commands.is_owner()
+async def ready_stats(ctx):
+    """Show how often the bot became ready or reconnected, and what startup cost."""
+    embed = discord.Embed(
+        title="Readiness",
+        color=discord.Color.blue(),
+    )
+    embed.add_field(name="Ready Events", value=readiness.ready_events, inline=True)
+    embed.add_field(name="Reconnects", value=readiness.reconnects, inline=True)
+    embed.add_field(name="Resumes", value=readiness.resumes, inline=True)
+    if readiness.total_seconds is not None:
+        phases = "\n".join(f"`{name}`: {seconds * 1000:.1f}ms" for name, seconds in readiness.timings.items())
+        embed.add_field(
+            name=f"Startup ({readiness.total_seconds * 1000:.1f}ms)",
+            value=phases or "No phases",
+            inline=False,
+        )
+    if readiness.last_ready:
+        embed.add_field(name="Last Ready", value=f"<t:{int(readiness.last_ready)}:R>", inline=False)
+    await ctx.send(embed=embed)
+
+@bot.command(name="rolestats", description="Show role change coalescing counters.")
+@commands.is_owner()
+async def role_stats(ctx):
+    """Show how many role changes were requested, how many member edits they took, and self-role latencies."""
+    stats = role_mutations.stats()
+    embed = discord.Embed(
+        title="Role Changes",
+        color=discord.Color.blue(),
+    )
+    embed.add_field(name="Requested", value=stats["requested"], inline=True)
+    embed.add_field(name="Member Edits", value=stats["edits"], inline=True)
+    embed.add_field(name="Coalesced", value=stats["coalesced"], inline=True)
+    embed.add_field(name="Rate Limited", value=stats["rate_limited"], inline=True)
+
+    # Where self-role menu interactions spend their time
+    for stage, histogram in selfrole_latency.items():
+        embed.add_field(name=f"Self-Role {stage.title()}", value=histogram.summary(), inline=False)
+    await ctx.send(embed=embed)
+
 @bot.command(name="restart", description="Restart the bot.")
 @commands.is_owner()
 async def restart(ctx, mode: str = None):
@@ -662,6 +796,9 @@ async def restart(ctx, mode: str = None):
                 color=discord.Color.red(),
             )
             await ctx.send(embed=embed)
+            await escalation_executor.drain()  # Finish escalations that are already underway
+            await log_dispatcher.flush()  # Don't drop queued log embeds
+            await selfrole_usage.flush()
             await bot.close()
             return
         else:
@@ -686,6 +823,10 @@ async def restart(ctx, mode: str = None):
     with open("restart_message.json", "w") as file:
         json.dump({"channel_id": ctx.channel.id, "message_id": message.id}, file)
 
+    # Apply pending escalations, then send any queued log embeds and usage counts before the connection closes
+    await escalation_executor.drain()
+    await log_dispatcher.flush()
+    await selfrole_usage.flush()
     await bot.close()
 
 @bot.event
@@ -798,6 +939,13 @@ async def main():
         await init_selfrole_db()  # Initialize the self-role database
         await init_moderation_db()  # Initialize the moderation database
 
+        # Warm the guild config caches so interactions never read configs from disk
+        await load_config_cache()
+        await load_moderation_config_cache()
+        await load_escalation_cache()
+        await load_verified_users()
+        start_legacy_backfill()  # Copy old global verification records in the background
+
         # Add the ConfigCommands cog
         await bot.add_cog(ConfigCommands(bot))  # Await the cog addition
 
@@ -812,6 +960,9 @@ async def main():
         from modules.audit_logging import AuditLogging
         await bot.add_cog(AuditLogging(bot))
 
+        from modules.cleanup import Cleanup
+        await bot.add_cog(Cleanup(bot))
+
         await bot.start(TOKEN)  # Start the bot
 
 # Run the bot
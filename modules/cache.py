@@ -0,0 +1,125 @@
+class GuildCache:
+    """
+    In-memory per-guild cache for configuration rows.
+
+    Once `load` has been called with every row of a table, the cache is
+    authoritative: a guild missing from it has no configuration, so lookups
+    never need to fall back to the database.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+
+    def load(self, rows, key=lambda row: row.guild_id, value=lambda row: row):
+        """Replace the cache contents with a full table of rows."""
+        self._entries = {key(row): value(row) for row in rows}
+        self.loaded = True
+
+    def lookup(self, guild_id: int):
+        """
+        Look up a guild in the cache.
+
+        Returns a (found, value) tuple. `found` is False only when the cache
+        cannot answer and the caller has to query the database.
+        """
+        if guild_id in self._entries:
+            self.hits += 1
+            return True, self._entries[guild_id]
+        if self.loaded:
+            # The whole table is cached, so a missing guild has no row
+            self.hits += 1
+            return True, None
+        self.misses += 1
+        return False, None
+
+    def values(self) -> list:
+        """Return every cached value."""
+        return list(self._entries.values())
+
+    def set(self, guild_id: int, value):
+        """Store or replace the cached value for a guild."""
+        self._entries[guild_id] = value
+
+    def discard(self, guild_id: int):
+        """Drop a guild from the cache, e.g. after its row was deleted."""
+        self._entries.pop(guild_id, None)
+
+    def discard_guild(self, guild_id: int):
+        """Drop every entry of a guild, including entries keyed by (guild_id, ...) tuples."""
+        for key in [key for key in self._entries if key == guild_id or (isinstance(key, tuple) and key[0] == guild_id)]:
+            del self._entries[key]
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for this cache."""
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+
+class GuildMemberSet:
+    """
+    In-memory set of (guild_id, user_id) pairs, stored as one set of native
+    integer user IDs per guild.
+
+    Like GuildCache, the set is authoritative once `load` has been called
+    with every pair from its table.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+        self._members = {}
+
+    def load(self, pairs):
+        """Replace the set contents with every (guild_id, user_id) pair from a table."""
+        self._members = {}
+        for guild_id, user_id in pairs:
+            self._members.setdefault(int(guild_id), set()).add(int(user_id))
+        self.loaded = True
+
+    def lookup(self, guild_ids, user_id: int):
+        """
+        Check whether a user is in the set for any of the given guilds.
+
+        Returns a (found, present) tuple. `found` is False only when the set
+        is not loaded yet and the caller has to query the database.
+        """
+        if not self.loaded:
+            self.misses += 1
+            return False, False
+        self.hits += 1
+        user_id = int(user_id)
+        return True, any(user_id in self._members.get(guild_id, ()) for guild_id in guild_ids)
+
+    def add(self, guild_id: int, user_id: int):
+        self._members.setdefault(int(guild_id), set()).add(int(user_id))
+
+    def discard(self, guild_id: int, user_id: int):
+        members = self._members.get(int(guild_id))
+        if members is not None:
+            members.discard(int(user_id))
+
+    def discard_guild(self, guild_id: int):
+        self._members.pop(int(guild_id), None)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for this set."""
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "entries": sum(len(members) for members in self._members.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
@@ -0,0 +1,99 @@
+import discord
+from discord.ext import commands
+from modules.database import shared_session
+from modules.verification import async_session, config_cache, clear_deleted_role, clear_deleted_channel, clear_guild_messages
+from modules.moderation_db import moderation_session, moderation_config_cache, clear_deleted_moderation_channel
+from modules.selfroles_db import (
+    selfrole_session,
+    clear_deleted_selfrole_role,
+    clear_deleted_selfrole_channel,
+    clear_guild_selfrole_messages,
+    forget_selfrole_role,
+    invalidate_resolved_selfroles,
+)
+
+async def run_cleanup(steps: list) -> list:
+    """
+    Run cleanup steps across modules and return their results in order.
+
+    Each step is a (session factory, coroutine function taking a session)
+    pair. In unified mode every step runs in one transaction on the shared
+    session, otherwise each step commits on its own module's session.
+    """
+    results = []
+    if shared_session:
+        async with shared_session() as session:
+            for _, step in steps:
+                results.append(await step(session))
+            await session.commit()
+        return results
+
+    for session_factory, step in steps:
+        async with session_factory() as session:
+            results.append(await step(session))
+            await session.commit()
+    return results
+
+
+class Cleanup(commands.Cog):
+    """
+    Prunes configuration rows that point at deleted roles and channels, or
+    at guilds the bot left, as soon as Discord reports it, so hot paths never
+    look up dead references.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        print("Cleanup cog loaded.")
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        guild_id = role.guild.id
+        config, selfrole_config_ids = await run_cleanup([
+            (async_session, lambda session: clear_deleted_role(session, guild_id, role.id)),
+            (selfrole_session, lambda session: clear_deleted_selfrole_role(session, role.id)),
+        ])
+
+        # Keep the caches in step with the committed rows
+        if config:
+            config_cache.set(guild_id, config)
+            print(f"Cleanup: Verified role {role.id} of guild {guild_id} was deleted and unset")
+        forget_selfrole_role(selfrole_config_ids, role.id)
+        invalidate_resolved_selfroles(guild_id)
+
+        if selfrole_config_ids:
+            print(f"Cleanup: Removed deleted role {role.id} from {len(selfrole_config_ids)} self-role config(s)")
+            # Posted menus of those configs still offer the deleted role
+            selfroles = self.bot.get_cog("SelfRoles")
+            if selfroles:
+                for config_id in selfrole_config_ids:
+                    selfroles.schedule_menu_refresh(config_id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        guild_id = channel.guild.id
+        config, moderation_config, selfrole_config_ids = await run_cleanup([
+            (async_session, lambda session: clear_deleted_channel(session, guild_id, channel.id)),
+            (moderation_session, lambda session: clear_deleted_moderation_channel(session, guild_id, channel.id)),
+            (selfrole_session, lambda session: clear_deleted_selfrole_channel(session, channel.id)),
+        ])
+
+        if config:
+            config_cache.set(guild_id, config)
+            print(f"Cleanup: Deleted channel {channel.id} was unset in the verification config of guild {guild_id}")
+        if moderation_config:
+            moderation_config_cache.set(guild_id, moderation_config)
+            print(f"Cleanup: Moderation log channel {channel.id} of guild {guild_id} was deleted and unset")
+        if selfrole_config_ids:
+            print(f"Cleanup: Forgot self-role menus of {len(selfrole_config_ids)} config(s) in deleted channel {channel.id}")
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        # Configurations and records are kept in case the bot is added back,
+        # but messages in the guild can no longer be edited
+        await run_cleanup([
+            (async_session, lambda session: clear_guild_messages(session, guild.id)),
+            (selfrole_session, lambda session: clear_guild_selfrole_messages(session, guild.id)),
+        ])
+        invalidate_resolved_selfroles(guild.id)
+        print(f"Cleanup: Forgot posted messages of removed guild {guild.id}")
@@ -0,0 +1,247 @@
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy import event
+from modules.metrics import Histogram
+import greenlet
+import time
+import yaml
+import sys
+import os
+
+# Ensure the database folder exists
+DATABASE_FOLDER = "database"
+os.makedirs(DATABASE_FOLDER, exist_ok=True)
+
+# Name of the single database file used when storage is unified
+UNIFIED_DATABASE_NAME = "bot"
+
+def load_database_settings() -> dict:
+    """Read the optional DATABASE section of config/config.yml."""
+    try:
+        with open("config/config.yml", "r") as file:
+            config = yaml.safe_load(file) or {}
+    except FileNotFoundError:
+        return {}
+    return config.get("DATABASE") or {}
+
+database_settings = load_database_settings()
+
+# When enabled, every module's tables live in one database file behind one
+# engine and one connection pool instead of a file and pool per module.
+UNIFIED = bool(database_settings.get("unified", False))
+
+# SQLite performance profile applied to every connection. WAL lets readers
+# run alongside a writer, and synchronous=NORMAL only syncs at checkpoints
+# instead of on every commit. Each value can be overridden in the DATABASE
+# section of config/config.yml.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size_kib": 16384,
+    "mmap_size_mib": 64,
+    "busy_timeout_ms": 5000,
+}
+
+JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+def build_pragmas(settings: dict) -> list[str]:
+    """Build the PRAGMA statements for the configured performance profile."""
+    values = {key: settings.get(key, default) for key, default in DEFAULT_PRAGMAS.items()}
+
+    journal_mode = str(values["journal_mode"]).upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f"Invalid DATABASE.journal_mode in config.yml: {values['journal_mode']}")
+    synchronous = str(values["synchronous"]).upper()
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f"Invalid DATABASE.synchronous in config.yml: {values['synchronous']}")
+
+    return [
+        f"PRAGMA journal_mode={journal_mode}",
+        f"PRAGMA synchronous={synchronous}",
+        # A negative cache_size is a size in KiB rather than a page count
+        f"PRAGMA cache_size=-{int(values['cache_size_kib'])}",
+        f"PRAGMA mmap_size={int(values['mmap_size_mib']) * 1024 * 1024}",
+        f"PRAGMA busy_timeout={int(values['busy_timeout_ms'])}",
+    ]
+
+connection_pragmas = build_pragmas(database_settings)
+
+def apply_pragmas(dbapi_connection, connection_record):
+    """Apply the performance profile to a freshly opened SQLite connection."""
+    cursor = dbapi_connection.cursor()
+    for pragma in connection_pragmas:
+        cursor.execute(pragma)
+    cursor.close()
+
+class QueryInstrumentation:
+    """
+    Opt-in query timing for every engine.
+
+    When enabled, records a latency histogram per SQL statement, counts
+    queries per call site (the module function that issued them, such as
+    get_config) and prints statements slower than `slow_query_ms`. The event
+    listeners are only attached while enabled, so it costs nothing when off.
+    """
+
+    def __init__(self, slow_query_ms: float):
+        self.enabled = False
+        self.slow_query_ms = slow_query_ms
+        self.reset()
+
+    def reset(self):
+        """Clear all recorded statistics."""
+        self.statements = {}
+        self.call_sites = {}
+        self.slow_queries = 0
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        for engine in _engines.values():
+            self.attach(engine)
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        for engine in _engines.values():
+            event.remove(engine.sync_engine, "before_cursor_execute", self.before_cursor_execute)
+            event.remove(engine.sync_engine, "after_cursor_execute", self.after_cursor_execute)
+
+    def attach(self, engine):
+        event.listen(engine.sync_engine, "before_cursor_execute", self.before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", self.after_cursor_execute)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start_times = conn.info.get("query_start_times")
+        if not start_times:
+            return
+        elapsed_ms = (time.perf_counter() - start_times.pop()) * 1000
+
+        key = " ".join(statement.split())
+        histogram = self.statements.get(key)
+        if histogram is None:
+            histogram = self.statements[key] = Histogram()
+        histogram.observe(elapsed_ms)
+
+        call_site = find_call_site()
+        self.call_sites[call_site] = self.call_sites.get(call_site, 0) + 1
+
+        if elapsed_ms >= self.slow_query_ms:
+            self.slow_queries += 1
+            print(f"Database: Slow query ({elapsed_ms:.1f} ms) from {call_site}: {key[:200]}")
+
+# Frames from the bot's own files, other than this one, count as call sites
+DATABASE_MODULE = os.path.abspath(__file__)
+BOT_FOLDER = os.path.dirname(os.path.dirname(DATABASE_MODULE))
+
+def find_call_site() -> str:
+    """
+    Return the name of the bot function that issued the current query.
+
+    SQLAlchemy runs async queries inside a greenlet, so the calling coroutine
+    frames are found on the parent greenlet's suspended stack.
+    """
+    current = greenlet.getcurrent()
+    frame = current.parent.gr_frame if current.parent else sys._getframe()
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        # The readme puts the virtualenv inside the bot folder, so skip libraries
+        if filename.startswith(BOT_FOLDER) and filename != DATABASE_MODULE and "site-packages" not in filename:
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return "unknown"
+
+instrumentation = QueryInstrumentation(float(database_settings.get("slow_query_ms", 100)))
+
+_engines = {}
+
+def database_url(name: str) -> str:
+    """Return the SQLAlchemy URL of a database file in the database folder."""
+    return f"sqlite+aiosqlite:///{DATABASE_FOLDER}/{name}.db"
+
+def get_engine(name: str):
+    """
+    Return the async engine for a module's database.
+
+    In unified mode every module gets the same shared engine, so its tables
+    are registered on one pool and can be written in a single transaction.
+    """
+    if UNIFIED:
+        name = UNIFIED_DATABASE_NAME
+    if name not in _engines:
+        engine = create_async_engine(database_url(name), echo=bool(database_settings.get("echo", False)))
+        event.listen(engine.sync_engine, "connect", apply_pragmas)
+        if instrumentation.enabled:
+            instrumentation.attach(engine)
+        _engines[name] = engine
+    return _engines[name]
+
+def get_sessionmaker(name: str):
+    """Return a session factory bound to a module's engine."""
+    return sessionmaker(get_engine(name), expire_on_commit=False, class_=AsyncSession)
+
+# Session factory spanning every module's tables, only available in unified mode
+shared_session = get_sessionmaker(UNIFIED_DATABASE_NAME) if UNIFIED else None
+
+if database_settings.get("instrumentation", False):
+    instrumentation.enable()
+
+async def import_legacy_database(name: str, *metadatas):
+    """
+    Copy a module's rows from its old per-module database file into the
+    unified database.
+
+    Runs once: the old file is renamed to `<name>.db.imported` afterwards.
+    Tables that already hold rows in the unified database are left alone.
+    The old file is copied before its migrations run, so columns added since
+    must have a server default to fill them in.
+    """
+    if not UNIFIED:
+        return
+    path = os.path.join(DATABASE_FOLDER, f"{name}.db")
+    if not os.path.exists(path):
+        return
+
+    engine = get_engine(name)
+    tables = [table for metadata in metadatas for table in metadata.sorted_tables]
+    async with engine.begin() as conn:
+        # Tables outside the module's main metadata may not exist yet
+        for metadata in metadatas:
+            await conn.run_sync(metadata.create_all)
+
+    async with engine.connect() as conn:
+        # ATTACH must run outside of a transaction
+        await conn.exec_driver_sql("ATTACH DATABASE ? AS legacy", (path,))
+        try:
+            for table in tables:
+                result = await conn.exec_driver_sql(f"PRAGMA legacy.table_info('{table.name}')")
+                legacy_columns = {row[1] for row in result.fetchall()}
+                if not legacy_columns:
+                    continue
+
+                result = await conn.exec_driver_sql(f'SELECT 1 FROM main."{table.name}" LIMIT 1')
+                if result.first():
+                    print(f"Database: Skipping import of {table.name}, unified table is not empty")
+                    continue
+
+                columns = ", ".join(f'"{column.name}"' for column in table.columns if column.name in legacy_columns)
+                result = await conn.exec_driver_sql(
+                    f'INSERT INTO main."{table.name}" ({columns}) SELECT {columns} FROM legacy."{table.name}"'
+                )
+                print(f"Database: Imported {result.rowcount} rows into {table.name} from {name}.db")
+            await conn.commit()
+        except Exception:
+            # DETACH fails while the copy's transaction is still open and
+            # would hide the original error
+            await conn.rollback()
+            raise
+        finally:
+            await conn.exec_driver_sql("DETACH DATABASE legacy")
+
+    os.replace(path, f"{path}.imported")
@@ -0,0 +1,143 @@
+import discord
+import datetime
+from modules import moderation_logging
+from modules.keyed_queue import KeyedQueue
+
+ACTION_TITLES = {
+    "timeout": "Auto-Timeout",
+    "kick": "Auto-Kick",
+    "ban": "Auto-Ban",
+}
+
+def describe_rule(rule) -> str:
+    """Describe an escalation rule in one line, e.g. "Ban at 3 warnings within 24h"."""
+    text = f"{rule.action.capitalize()} at {rule.threshold} warnings"
+    if rule.window_hours:
+        text += f" within {rule.window_hours}h"
+    if rule.action == "timeout":
+        text += f" for {rule.duration_minutes or 60} min"
+    return text
+
+class EscalationExecutor:
+    """
+    Background queue for escalation actions.
+
+    `submit` returns immediately, so the moderator's reply to a warning is
+    not held up by the DM and the timeout, kick or ban REST calls. Each guild
+    gets a worker that applies its queued actions one at a time and reports
+    back through the interaction's followup and the moderation log.
+    """
+
+    def __init__(self):
+        self.submitted = 0
+        self.failed = 0
+        self._queue = KeyedQueue(self._apply_next)
+
+    def submit(self, bot, interaction: discord.Interaction, member: discord.Member, rule, warning_id: int, reason: str, dm_sent: bool):
+        """Queue an escalation action for a warned member without waiting for it."""
+        self._queue.put(member.guild.id, (bot, interaction, member, rule, warning_id, reason, dm_sent))
+        self.submitted += 1
+
+    async def drain(self):
+        """Wait until every queued action has been applied."""
+        await self._queue.join()
+
+    async def _apply_next(self, guild_id: int, queue: list):
+        job = queue.pop(0)
+        try:
+            await self._apply(*job)
+        except Exception as e:
+            self.failed += 1
+            print(f"Escalation: Failed to apply action in guild {guild_id}: {e}")
+
+    async def _apply(self, bot, interaction, member, rule, warning_id, reason, dm_sent):
+        guild = member.guild
+        title = ACTION_TITLES[rule.action]
+        permission = {
+            "timeout": "moderate_members",
+            "kick": "kick_members",
+            "ban": "ban_members",
+        }[rule.action]
+
+        # Check the bot can still act on the member before telling them anything
+        if not getattr(guild.me.guild_permissions, permission):
+            await self._report(interaction, "Warning", f"{title} failed: bot missing {permission.replace('_', ' ')} permission")
+            return
+        if not guild.me.top_role > member.top_role:
+            await self._report(interaction, "Warning", f"{title} failed: target has higher role than bot")
+            return
+
+        action_reason = f"Automatic {rule.action} after {rule.threshold} warnings. Last warning: {reason}"
+        duration = datetime.timedelta(minutes=rule.duration_minutes or 60)
+
+        # DM the member before a kick or ban removes the shared server
+        action_dm_sent = False
+        try:
+            dm_embed = discord.Embed(
+                title=title,
+                description=f"{rule.action.capitalize()} in {guild.name}: {rule.threshold} warnings reached",
+                color=discord.Color.red()
+            )
+            dm_embed.add_field(name="Reason", value=action_reason, inline=False)
+            if rule.action == "timeout":
+                dm_embed.add_field(name="Duration", value=f"{int(duration.total_seconds() // 60)} minutes", inline=True)
+            await member.send(embed=dm_embed)
+            action_dm_sent = True
+        except discord.Forbidden:
+            # User has DMs disabled
+            pass
+        except Exception as e:
+            print(f"Error sending escalation DM: {e}")
+
+        try:
+            if rule.action == "timeout":
+                await member.timeout(duration, reason=action_reason)
+            elif rule.action == "kick":
+                await member.kick(reason=action_reason)
+            else:
+                await member.ban(reason=action_reason)
+        except discord.Forbidden:
+            await self._report(interaction, "Error", f"Cannot {rule.action}: missing permissions", discord.Color.red())
+            return
+        except discord.HTTPException as e:
+            self.failed += 1
+            print(f"{title} error: {e}")
+            await self._report(interaction, "Error", f"{title} failed: {e}", discord.Color.red())
+            return
+
+        log_embed = discord.Embed(
+            title=title,
+            description=f"{member.mention}: {describe_rule(rule)}",
+            color=discord.Color.red(),
+        )
+        log_embed.add_field(name="Reason", value=action_reason, inline=True)
+        log_embed.add_field(name="Mod", value=interaction.user.mention, inline=True)
+        if not dm_sent and not action_dm_sent:
+            log_embed.add_field(name="Notice", value="User could not be notified via DM", inline=False)
+        await moderation_logging.log_moderation_action(bot, guild.id, log_embed)
+
+        mod_embed = discord.Embed(
+            title=title,
+            description=f"{member.mention}: {describe_rule(rule)}",
+            color=discord.Color.red(),
+        )
+        mod_embed.add_field(name="Warning ID", value=f"#{warning_id}", inline=True)
+        await self._followup(interaction, mod_embed)
+
+    async def _report(self, interaction, title: str, message: str, color=discord.Color.orange()):
+        embed = discord.Embed(
+            title=title,
+            description=message,
+            color=color
+        )
+        await self._followup(interaction, embed)
+
+    async def _followup(self, interaction, embed):
+        try:
+            await interaction.followup.send(embed=embed, ephemeral=True)
+        except discord.HTTPException as e:
+            # The interaction token expires after 15 minutes
+            print(f"Escalation: Could not notify the moderator: {e}")
+
+# Shared executor for every escalation action
+escalation_executor = EscalationExecutor()
@@ -0,0 +1,48 @@
+import asyncio
+
+class KeyedQueue:
+    """
+    Per-key queues, each drained by one background worker.
+
+    `put` appends an item to a key's queue and starts a worker for the key if
+    none is running. The worker optionally awaits `delay` first, so items
+    queued meanwhile are handled together, then calls `handle(key, queue)`
+    until the queue is empty. `handle` receives the live list and pops the
+    items it takes, one or several at a time. Items for one key are handled
+    in order, while different keys run concurrently.
+    """
+
+    def __init__(self, handle, delay=None):
+        self._handle = handle
+        self._delay = delay
+        self._queues = {}
+        self._tasks = {}
+
+    def put(self, key, item):
+        """Queue an item for a key without waiting for it to be handled."""
+        self._queues.setdefault(key, []).append(item)
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._run(key))
+
+    def pending(self, key) -> list:
+        """Return the items of a key that no worker has taken yet."""
+        return self._queues.get(key, [])
+
+    async def join(self):
+        """Wait until every running worker has emptied its queue."""
+        tasks = list(self._tasks.values())
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, key):
+        try:
+            if self._delay is not None:
+                await self._delay()
+            queue = self._queues[key]
+            while queue:
+                await self._handle(key, queue)
+        finally:
+            # Nothing is awaited between the empty check and here, so no item
+            # can be queued for this key without a worker to handle it
+            del self._queues[key]
+            del self._tasks[key]
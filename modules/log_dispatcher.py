@@ -0,0 +1,77 @@
+import discord
+import asyncio
+from modules.keyed_queue import KeyedQueue
+
+# Discord limits for a single message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARACTERS_PER_MESSAGE = 6000
+
+class LogDispatcher:
+    """
+    Background queue for log channel embeds.
+
+    `enqueue` returns immediately. Each (guild, channel) pair gets a worker
+    that waits for the flush window, then sends queued embeds in as few
+    messages as possible (up to 10 embeds per message), backing off when
+    Discord answers with a 429.
+    """
+
+    def __init__(self, flush_interval: float = 1.0, max_retries: int = 5):
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._queue = KeyedQueue(self._send_queued, delay=self._wait_for_flush)
+        self._flush_now = asyncio.Event()
+
+    def enqueue(self, channel: discord.TextChannel, embed: discord.Embed):
+        """Queue an embed for a log channel without waiting for it to be sent."""
+        self._queue.put((channel.guild.id, channel.id), (channel, embed))
+
+    async def flush(self):
+        """Send everything that is queued right away and wait for it to finish."""
+        self._flush_now.set()
+        await self._queue.join()
+        self._flush_now.clear()
+
+    async def _wait_for_flush(self):
+        try:
+            await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _send_queued(self, key, queue: list):
+        channel = queue[0][0]
+        batch = self._take_batch(queue)
+        await self._send(channel, batch)
+
+    @staticmethod
+    def _take_batch(queue: list) -> list:
+        """Pop the largest run of queued (channel, embed) pairs that fits in one message and return its embeds."""
+        batch = []
+        characters = 0
+        while queue and len(batch) < MAX_EMBEDS_PER_MESSAGE:
+            size = len(queue[0][1])
+            if batch and characters + size > MAX_EMBED_CHARACTERS_PER_MESSAGE:
+                break
+            batch.append(queue.pop(0)[1])
+            characters += size
+        return batch
+
+    async def _send(self, channel: discord.TextChannel, embeds: list):
+        delay = 1.0
+        for attempt in range(self.max_retries):
+            try:
+                await channel.send(embeds=embeds)
+                return
+            except discord.HTTPException as e:
+                if e.status != 429 or attempt == self.max_retries - 1:
+                    print(f"LogDispatcher: Failed to send {len(embeds)} log embeds to channel {channel.id}: {e}")
+                    return
+                retry_after = e.response.headers.get("Retry-After") if e.response is not None else None
+                await asyncio.sleep(float(retry_after) if retry_after else delay)
+                delay *= 2
+            except Exception as e:
+                print(f"LogDispatcher: Error sending log embeds to channel {channel.id}: {e}")
+                return
+
+# Shared dispatcher used by verification and moderation logging
+log_dispatcher = LogDispatcher()
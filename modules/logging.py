@@ -1,10 +1,13 @@
 import discord
 from discord.ext.commands import Bot
 from modules.verification import get_config
+from modules.log_dispatcher import log_dispatcher
 
 async def log_verification(bot: Bot, guild_id: int, embed: discord.Embed):
     """
     Logs a verification event to the configured log channel for the guild.
+    The embed is queued on the log dispatcher, so this returns without
+    waiting for Discord.
 
     Args:
         bot (Bot): The bot instance.
@@ -19,7 +22,8 @@ async def log_verification(bot: Bot, guild_id: int, embed: discord.Embed):
                 # Check if bot has permissions to send messages
                 permissions = log_channel.permissions_for(log_channel.guild.me)
                 if permissions.send_messages and permissions.embed_links:
-                    await log_channel.send(embed=embed)
+                    # Queued and sent in batches in the background
+                    log_dispatcher.enqueue(log_channel, embed)
                 else:
                     print(f"Missing permissions in verification log channel {config.log_channel_id} for guild {guild_id}")
             else:
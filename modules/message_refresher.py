@@ -0,0 +1,56 @@
+import discord
+import asyncio
+
+async def refresh_messages(bot, messages, build, concurrency: int = 5) -> dict:
+    """
+    Edit posted bot messages in place with freshly built content.
+
+    Args:
+        bot: The bot, used to look up channels.
+        messages: (channel_id, message_id) pairs of the posted messages.
+        build: Coroutine function taking the channel and returning the new
+            (embed, view), or None to leave the message as it is.
+        concurrency (int): Maximum number of edits in flight. discord.py
+            queues requests per route bucket on top of this.
+
+    Returns a dict with the number of "edited" and "skipped" messages, and
+    the "missing" (channel_id, message_id) pairs whose message or channel
+    Discord reports as deleted, so the caller can drop them from its registry.
+    A channel that is only missing from the cache, e.g. while its guild is
+    unavailable, counts as skipped.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {"edited": 0, "skipped": 0, "missing": []}
+
+    async def refresh(channel_id, message_id):
+        channel = bot.get_channel(channel_id)
+        if channel is None:
+            try:
+                async with semaphore:
+                    channel = await bot.fetch_channel(channel_id)
+            except discord.NotFound:
+                results["missing"].append((channel_id, message_id))
+                return
+            except discord.HTTPException as e:
+                # No access right now or a transient error; keep the record
+                results["skipped"] += 1
+                print(f"MessageRefresher: Could not fetch channel {channel_id}: {e}")
+                return
+        content = await build(channel)
+        if content is None:
+            results["skipped"] += 1
+            return
+        embed, view = content
+
+        async with semaphore:
+            try:
+                await channel.get_partial_message(message_id).edit(embed=embed, view=view)
+                results["edited"] += 1
+            except discord.NotFound:
+                results["missing"].append((channel_id, message_id))
+            except discord.HTTPException as e:
+                results["skipped"] += 1
+                print(f"MessageRefresher: Failed to refresh message {message_id} in channel {channel_id}: {e}")
+
+    await asyncio.gather(*(refresh(channel_id, message_id) for channel_id, message_id in messages))
+    return results
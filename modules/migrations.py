@@ -0,0 +1,47 @@
+from sqlalchemy import text
+
+# Tracks the applied schema version of each module's tables. A table rather
+# than PRAGMA user_version, so several modules can share one database file.
+CREATE_MIGRATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    module VARCHAR PRIMARY KEY,
+    version INTEGER NOT NULL
+)
+"""
+
+async def apply_migrations(conn, module: str, migrations: list):
+    """
+    Apply pending schema migrations for a module.
+
+    Args:
+        conn: An open AsyncConnection inside a transaction.
+        module (str): The name the module's version is tracked under.
+        migrations (list): Migration steps in order. Step N (1-based) moves the
+            schema to version N and is either a list of SQL strings or a
+            callable taking the connection.
+    """
+    await conn.execute(text(CREATE_MIGRATIONS_TABLE))
+    result = await conn.execute(
+        text("SELECT version FROM schema_migrations WHERE module = :module"),
+        {"module": module},
+    )
+    current = result.scalar() or 0
+
+    for version, step in enumerate(migrations, start=1):
+        if version <= current:
+            continue
+        if callable(step):
+            await step(conn)
+        else:
+            for statement in step:
+                await conn.execute(text(statement))
+        print(f"Migrations: {module} schema upgraded to version {version}")
+
+    if len(migrations) > current:
+        await conn.execute(
+            text(
+                "INSERT INTO schema_migrations (module, version) VALUES (:module, :version) "
+                "ON CONFLICT(module) DO UPDATE SET version = excluded.version"
+            ),
+            {"module": module, "version": len(migrations)},
+        )
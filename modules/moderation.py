@@ -2,11 +2,19 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from modules.moderation_db import (
-    set_moderation_log_channel, add_warning, get_user_warnings, get_warning_by_id, 
+    set_moderation_log_channel, add_warning, get_warning_by_id, 
     remove_warning, clear_user_warnings, get_moderation_config, set_audit_logging, 
-    is_audit_logging_enabled
+    is_audit_logging_enabled, get_active_warning_count, clear_warnings_bulk,
+    set_warning_ttl, expire_warnings, warning_expiry,
+    get_escalation_ladder, get_escalation_step, get_escalation_counts, set_escalation_rule, remove_escalation_rule,
+    DEFAULT_ESCALATION_RULES, get_user_warnings_page
 )
 from modules import moderation_logging
+from modules.escalation import escalation_executor, describe_rule
+import datetime
+
+# Warnings shown per /warnings page
+WARNINGS_PAGE_SIZE = 5
 
 # Helper function to create admin check
 def is_admin():
@@ -36,9 +44,111 @@ def is_mod():
         return True
     return app_commands.check(predicate)
 
+def build_escalation_embed(title: str, ladder, color: discord.Color) -> discord.Embed:
+    """Build an embed listing the steps of an escalation ladder."""
+    embed = discord.Embed(
+        title=title,
+        description="\n".join(describe_rule(rule) for rule in ladder.rules),
+        color=color,
+    )
+    if ladder.rules == DEFAULT_ESCALATION_RULES:
+        embed.set_footer(text="Default rules. Use /escalation_set to configure your own.")
+    return embed
+
+# Warning timestamps are stored as naive UTC and travel in custom_ids as microseconds
+EPOCH = datetime.datetime(1970, 1, 1)
+
+class WarningsPageButton(discord.ui.DynamicItem[discord.ui.Button], template=r"warnings:(?P<user_id>[0-9]+):(?P<direction>prev|next):(?P<timestamp>[0-9]+):(?P<warning_id>[0-9]+)"):
+    """
+    Previous/next button of a /warnings listing.
+
+    The custom_id carries the member and the (timestamp, id) of the warning
+    to page from, so each click fetches exactly one page and the buttons keep
+    working across restarts without any view held in memory.
+    """
+
+    def __init__(self, user_id: int, direction: str, cursor=None):
+        timestamp, warning_id = cursor if cursor else (EPOCH, 0)
+        button = discord.ui.Button(
+            label="Previous" if direction == "prev" else "Next",
+            style=discord.ButtonStyle.secondary,
+            disabled=cursor is None,
+            custom_id=f"warnings:{user_id}:{direction}:{(timestamp - EPOCH) // datetime.timedelta(microseconds=1)}:{warning_id}",
+        )
+        super().__init__(button)
+        self.user_id = user_id
+        self.direction = direction
+        self.cursor = (timestamp, warning_id)
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        timestamp = EPOCH + datetime.timedelta(microseconds=int(match["timestamp"]))
+        return cls(int(match["user_id"]), match["direction"], (timestamp, int(match["warning_id"])))
+
+    async def callback(self, interaction: discord.Interaction):
+        if self.direction == "next":
+            embed, view = await build_warnings_page(interaction.guild, self.user_id, before=self.cursor)
+        else:
+            embed, view = await build_warnings_page(interaction.guild, self.user_id, after=self.cursor)
+        await interaction.response.edit_message(embed=embed, view=view)
+
+async def build_warnings_page(guild: discord.Guild, user_id: int, before=None, after=None):
+    """
+    Build the embed and paging buttons for one page of a member's active warnings.
+
+    Returns (embed, None) when the member has no warnings left.
+    """
+    warnings, has_more = await get_user_warnings_page(guild.id, user_id, before=before, after=after, limit=WARNINGS_PAGE_SIZE)
+    if not warnings and (before or after):
+        # The page paged from is gone, e.g. after its warnings were removed
+        before = after = None
+        warnings, has_more = await get_user_warnings_page(guild.id, user_id, limit=WARNINGS_PAGE_SIZE)
+
+    if not warnings:
+        embed = discord.Embed(
+            title="Warnings",
+            description=f"<@{user_id}>: No warnings",
+            color=discord.Color.green(),
+        )
+        return embed, None
+
+    count = await get_active_warning_count(guild.id, user_id)
+    ladder = await get_escalation_ladder(guild.id)
+    embed = discord.Embed(
+        title="Warnings",
+        description=f"<@{user_id}>: {count}/{ladder.limit} warnings",
+        color=discord.Color.yellow(),
+    )
+
+    for warning in warnings:
+        timestamp = warning.timestamp.strftime("%Y-%m-%d %H:%M:%S")
+        moderator = guild.get_member(warning.moderator_id)
+        moderator_name = moderator.mention if moderator else f"<@{warning.moderator_id}>"
+
+        embed.add_field(
+            name=f"Warning #{warning.id}",
+            value=f"**Reason:** {warning.reason}\n**Moderator:** {moderator_name}\n**Date:** {timestamp}",
+            inline=False
+        )
+
+    # Paging backwards always leaves older warnings behind, paging forwards newer ones
+    has_newer = has_more if after else before is not None
+    has_older = True if after else has_more
+    first, last = warnings[0], warnings[-1]
+    view = discord.ui.View(timeout=None)
+    view.add_item(WarningsPageButton(user_id, "prev", (first.timestamp, first.id) if has_newer else None))
+    view.add_item(WarningsPageButton(user_id, "next", (last.timestamp, last.id) if has_older else None))
+    if not has_newer and not has_older:
+        view = None
+    return embed, view
+
 class Moderation(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        bot.add_dynamic_items(WarningsPageButton)
+
+    async def cog_load(self):
+        warning_expiry.start()
 
     @app_commands.command(name="ban", description="Ban a member. Requires a reason.")
     @app_commands.describe(member="The member to ban.", reason="The reason for the ban.")
@@ -322,7 +432,7 @@ class Moderation(commands.Cog):
             print(f"Error sending DM for unban: {e}")
             pass
 
-    @app_commands.command(name="warn", description="Warn a member. Requires a reason. 3 warnings will result in an automatic ban.")
+    @app_commands.command(name="warn", description="Warn a member. Requires a reason. Warnings can trigger the server's escalation rules.")
     @app_commands.describe(member="The member to warn.", reason="The reason for the warning.")
     @is_mod()
     async def warn(self, interaction: discord.Interaction, member: discord.Member, reason: str):
@@ -364,9 +474,10 @@ class Moderation(commands.Cog):
             reason=reason
         )
         
-        # Get all warnings for this user after adding the new one
-        warnings = await get_user_warnings(interaction.guild.id, member.id)
-        warning_count = len(warnings)
+        # Count this user's warnings, including the new one, and find the escalation step reached
+        warning_count = await get_active_warning_count(interaction.guild.id, member.id)
+        ladder = await get_escalation_ladder(interaction.guild.id)
+        rule = await get_escalation_step(interaction.guild.id, member.id, warning_count)
             
         # Create an embed for the warning log (includes moderator info for log channel)
         embed = discord.Embed(
@@ -376,7 +487,7 @@ class Moderation(commands.Cog):
         )
         embed.add_field(name="ID", value=f"#{warning_id}", inline=True)
         embed.add_field(name="Reason", value=reason, inline=True)
-        embed.add_field(name="Count", value=f"{warning_count}/3", inline=True)
+        embed.add_field(name="Count", value=f"{warning_count}/{ladder.limit}", inline=True)
         embed.add_field(name="Moderator", value=interaction.user.mention, inline=True)
         
         # Create a copy of the embed for the moderator without moderator field
@@ -387,7 +498,9 @@ class Moderation(commands.Cog):
         )
         mod_embed.add_field(name="ID", value=f"#{warning_id}", inline=True)
         mod_embed.add_field(name="Reason", value=reason, inline=True)
-        mod_embed.add_field(name="Count", value=f"{warning_count}/3", inline=True)
+        mod_embed.add_field(name="Count", value=f"{warning_count}/{ladder.limit}", inline=True)
+        if rule:
+            mod_embed.add_field(name="Escalation", value=describe_rule(rule), inline=False)
         
         # Send confirmation to the moderator
         await interaction.response.send_message(embed=mod_embed, ephemeral=True)
@@ -403,12 +516,12 @@ class Moderation(commands.Cog):
                 color=discord.Color.yellow()
             )
             user_embed.add_field(name="Reason", value=reason, inline=True)
-            user_embed.add_field(name="Count", value=f"{warning_count}/3", inline=True)
+            user_embed.add_field(name="Count", value=f"{warning_count}/{ladder.limit}", inline=True)
             
-            if warning_count >= 3:
+            if rule:
                 user_embed.add_field(
-                    name="Auto-Ban", 
-                    value="3 warnings = automatic ban", 
+                    name="Escalation", 
+                    value=describe_rule(rule), 
                     inline=False
                 )
             
@@ -429,125 +542,20 @@ class Moderation(commands.Cog):
         # Update the log
         await moderation_logging.log_moderation_action(self.bot, interaction.guild.id, embed)
             
-        # Auto-ban after 3 warnings
-        if warning_count >= 3:
-            # Check if bot has ban permission before attempting auto-ban
-            if not interaction.guild.me.guild_permissions.ban_members:
-                error_embed = discord.Embed(
-                    title="Warning",
-                    description="Auto-ban failed: bot missing ban permission",
-                    color=discord.Color.orange()
-                )
-                await interaction.followup.send(embed=error_embed, ephemeral=True)
-            elif not interaction.guild.me.top_role > member.top_role:
-                error_embed = discord.Embed(
-                    title="Warning",
-                    description="Auto-ban failed: target has higher role than bot",
-                    color=discord.Color.orange()
-                )
-                await interaction.followup.send(embed=error_embed, ephemeral=True)
-            else:
-                try:
-                    # Track if autoban DM was sent (separate from warning DM)
-                    autoban_dm_sent = False
-                    
-                    # Try to DM the user BEFORE banning
-                    auto_ban_reason = f"Automatic ban after 3 warnings. Last warning: {reason}"
-                    try:
-                        ban_embed = discord.Embed(
-                            title=f"Auto-Ban",
-                            description=f"Banned from {interaction.guild.name}: 3 warnings reached",
-                            color=discord.Color.red()
-                        )
-                        ban_embed.add_field(name="Reason", value=auto_ban_reason, inline=False)
-                        await member.send(embed=ban_embed)
-                        autoban_dm_sent = True
-                    except discord.Forbidden:
-                        # User has DMs disabled
-                        pass
-                    except Exception as e:
-                        # Other errors with sending DM
-                        print(f"Error sending autoban DM: {e}")
-                        pass
-                    
-                    # Now ban the member
-                    await member.ban(reason=auto_ban_reason)
-                    
-                    # Create an embed for the auto-ban log
-                    autoban_embed = discord.Embed(
-                        title="Auto-Ban",
-                        description=f"{member.mention}: 3 warnings reached",
-                        color=discord.Color.red(),
-                    )
-                    autoban_embed.add_field(name="Reason", value=auto_ban_reason, inline=True)
-                    autoban_embed.add_field(name="Mod", value=interaction.user.mention, inline=True)
-                    
-                    # Add field indicating if user was notified about the auto-ban
-                    if not dm_sent and not autoban_dm_sent:
-                        autoban_embed.add_field(name="Notice", value="User could not be notified via DM", inline=False)
-                    
-                    # Log the ban
-                    await moderation_logging.log_moderation_action(self.bot, interaction.guild.id, autoban_embed)
-                    
-                    # Notify the moderator
-                    autoban_mod_embed = discord.Embed(
-                        title="Auto-Ban",
-                        description=f"{member.mention} banned: 3 warnings",
-                        color=discord.Color.red(),
-                    )
-                    autoban_mod_embed.add_field(name="Warning ID", value=f"#{warning_id}", inline=True)
-                    await interaction.followup.send(embed=autoban_mod_embed, ephemeral=True)
-                except discord.Forbidden:
-                    # Bot doesn't have permission to ban
-                    error_embed = discord.Embed(
-                        title="Error",
-                        description="Cannot auto-ban: missing permissions",
-                        color=discord.Color.red(),
-                    )
-                    await interaction.followup.send(embed=error_embed, ephemeral=True)
-                except Exception as e:
-                    # Log any other errors
-                    print(f"Auto-ban error: {e}")
-                    error_embed = discord.Embed(
-                        title="Error",
-                        description=f"Auto-ban failed: {e}",
-                        color=discord.Color.red(),
-                    )
-                    await interaction.followup.send(embed=error_embed, ephemeral=True)
+        # Timeout, kick or ban in the background; the moderator gets a followup
+        if rule:
+            escalation_executor.submit(self.bot, interaction, member, rule, warning_id, reason, dm_sent)
 
-    @app_commands.command(name="warnings", description="List all warnings for a member. Staff only.")
+    @app_commands.command(name="warnings", description="List the active warnings for a member, newest first. Staff only.")
     @app_commands.describe(member="The member to check warnings for.")
     @is_mod()
     async def warnings(self, interaction: discord.Interaction, member: discord.Member):
-        warnings = await get_user_warnings(interaction.guild.id, member.id)
-        
-        if not warnings:
-            embed = discord.Embed(
-                title="Warnings",
-                description=f"{member.mention}: No warnings",
-                color=discord.Color.green(),
-            )
+        # Only the first page is loaded; the buttons fetch the others on demand
+        embed, view = await build_warnings_page(interaction.guild, member.id)
+        if view:
+            await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+        else:
             await interaction.response.send_message(embed=embed, ephemeral=True)
-            return
-            
-        embed = discord.Embed(
-            title=f"Warnings",
-            description=f"{member.mention}: {len(warnings)}/3 warnings",
-            color=discord.Color.yellow(),
-        )
-        
-        for warning in warnings:
-            timestamp = warning.timestamp.strftime("%Y-%m-%d %H:%M:%S")
-            moderator = interaction.guild.get_member(warning.moderator_id)
-            moderator_name = moderator.mention if moderator else f"<@{warning.moderator_id}>"
-            
-            embed.add_field(
-                name=f"Warning #{warning.id}",
-                value=f"**Reason:** {warning.reason}\n**Moderator:** {moderator_name}\n**Date:** {timestamp}",
-                inline=False
-            )
-        
-        await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @app_commands.command(name="remove_warning", description="Remove a warning from a member.")
     @app_commands.describe(member="The member to remove the warning from.", warning_id="The ID of the warning to remove.")
@@ -622,9 +630,18 @@ class Moderation(commands.Cog):
         user_mention = user.mention if user else f"<@{warning.user_id}>"
         user_name = user.name if user else f"User ID: {warning.user_id}"
         
-        # Get total warnings for this user before removing one
-        all_warnings = await get_user_warnings(interaction.guild.id, warning.user_id)
-        warning_count = len(all_warnings)
+        # Count this user's warnings before removing one
+        warning_count = await get_active_warning_count(interaction.guild.id, warning.user_id)
+        remaining = warning_count if warning.expired else warning_count - 1
+        ladder = await get_escalation_ladder(interaction.guild.id)
+        # Removing a warning prevents a step when it takes the member back below it,
+        # in the windows that actually contain the warning
+        prevented = None
+        if not warning.expired:
+            counts = await get_escalation_counts(interaction.guild.id, warning.user_id, warning_count, ladder)
+            before = ladder.reached(counts)
+            if before is not ladder.reached(ladder.without_warning(counts, warning.timestamp)):
+                prevented = before
         
         # Remove the warning
         success = await remove_warning(warning_id)
@@ -637,13 +654,13 @@ class Moderation(commands.Cog):
                 color=discord.Color.green(),
             )
             log_embed.add_field(name="Reason", value=warning.reason, inline=True)
-            log_embed.add_field(name="Count", value=f"{warning_count-1}/3", inline=True)
+            log_embed.add_field(name="Count", value=f"{remaining}/{ladder.limit}", inline=True)
             log_embed.add_field(name="Moderator", value=interaction.user.mention, inline=True)
             
-            if warning_count == 3:
+            if prevented:
                 log_embed.add_field(
                     name="Note", 
-                    value="Auto-ban prevented", 
+                    value=f"Auto-{prevented.action} prevented", 
                     inline=False
                 )
             
@@ -654,12 +671,12 @@ class Moderation(commands.Cog):
                 color=discord.Color.green(),
             )
             mod_embed.add_field(name="Reason", value=warning.reason, inline=True)
-            mod_embed.add_field(name="Count", value=f"{warning_count-1}/3", inline=True)
+            mod_embed.add_field(name="Count", value=f"{remaining}/{ladder.limit}", inline=True)
             
-            if warning_count == 3:
+            if prevented:
                 mod_embed.add_field(
                     name="Note", 
-                    value="Auto-ban prevented", 
+                    value=f"Auto-{prevented.action} prevented", 
                     inline=False
                 )
             
@@ -709,22 +726,29 @@ class Moderation(commands.Cog):
     @app_commands.describe(member="The member to clear warnings for.")
     @is_mod()
     async def clearwarnings(self, interaction: discord.Interaction, member: discord.Member):
+        # Find the escalation step the member has reached before clearing
+        ladder = await get_escalation_ladder(interaction.guild.id)
+        active_count = await get_active_warning_count(interaction.guild.id, member.id)
+        counts = await get_escalation_counts(interaction.guild.id, member.id, active_count, ladder)
+        prevented = ladder.reached(counts)
+
         # Count of removed warnings
-        count = await clear_user_warnings(interaction.guild.id, member.id)
+        count, expired = await clear_user_warnings(interaction.guild.id, member.id)
+        summary = f"{count} warnings removed" if not expired else f"{count} active and {expired} expired warnings removed"
         
-        if count > 0:
+        if count or expired:
             # Create embed for the log
             log_embed = discord.Embed(
                 title="Warnings Cleared",
-                description=f"{member.mention}: {count} warnings removed",
+                description=f"{member.mention}: {summary}",
                 color=discord.Color.green(),
             )
             log_embed.add_field(name="By", value=interaction.user.mention, inline=True)
             
-            if count >= 3:
+            if prevented:
                 log_embed.add_field(
                     name="Note", 
-                    value="Auto-ban prevented", 
+                    value=f"Auto-{prevented.action} prevented", 
                     inline=True
                 )
             
@@ -741,7 +765,7 @@ class Moderation(commands.Cog):
             try:
                 user_embed = discord.Embed(
                     title=f"Warnings Cleared",
-                    description=f"{count} warnings removed in {interaction.guild.name}",
+                    description=f"{summary} in {interaction.guild.name}",
                     color=discord.Color.green()
                 )
                 await member.send(embed=user_embed)
@@ -783,10 +807,17 @@ class Moderation(commands.Cog):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
+        # Find the escalation step the user has reached before clearing
+        ladder = await get_escalation_ladder(interaction.guild.id)
+        active_count = await get_active_warning_count(interaction.guild.id, user_id_int)
+        counts = await get_escalation_counts(interaction.guild.id, user_id_int, active_count, ladder)
+        prevented = ladder.reached(counts)
+
         # Get warnings count before clearing
-        count = await clear_user_warnings(interaction.guild.id, user_id_int)
+        count, expired = await clear_user_warnings(interaction.guild.id, user_id_int)
+        summary = f"{count} warnings removed" if not expired else f"{count} active and {expired} expired warnings removed"
         
-        if count > 0:
+        if count or expired:
             # Try to fetch user info
             try:
                 user = await interaction.client.fetch_user(user_id_int)
@@ -800,16 +831,16 @@ class Moderation(commands.Cog):
             # Create embed for the log
             log_embed = discord.Embed(
                 title="Warnings Cleared",
-                description=f"{user_mention}: {count} warnings removed",
+                description=f"{user_mention}: {summary}",
                 color=discord.Color.green(),
             )
             log_embed.add_field(name="User ID", value=str(user_id_int), inline=True)
             log_embed.add_field(name="By", value=interaction.user.mention, inline=True)
             
-            if count >= 3:
+            if prevented:
                 log_embed.add_field(
                     name="Note", 
-                    value="Auto-ban prevented", 
+                    value=f"Auto-{prevented.action} prevented", 
                     inline=False
                 )
             
@@ -827,7 +858,7 @@ class Moderation(commands.Cog):
                 try:
                     user_embed = discord.Embed(
                         title=f"Warnings Cleared",
-                        description=f"{count} warnings removed in {interaction.guild.name}",
+                        description=f"{summary} in {interaction.guild.name}",
                         color=discord.Color.green()
                     )
                     await user.send(embed=user_embed)
@@ -853,6 +884,147 @@ class Moderation(commands.Cog):
             )
             await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    @app_commands.command(name="clearwarnings_bulk", description="Clear the warnings of many users, or of the whole server.")
+    @app_commands.describe(
+        user_ids="User IDs or mentions separated by spaces. Leave empty to clear every warning in the server.",
+        confirm="Must be True to clear every warning in the server.",
+    )
+    @is_admin()
+    async def clearwarnings_bulk(self, interaction: discord.Interaction, user_ids: str = None, confirm: bool = False):
+        """Clear warnings in bulk, e.g. after a raid."""
+        if user_ids:
+            try:
+                targets = {int(value.strip("<@!>")) for value in user_ids.split()}
+            except ValueError:
+                embed = discord.Embed(
+                    title="Error",
+                    description="Invalid user ID format",
+                    color=discord.Color.red()
+                )
+                await interaction.response.send_message(embed=embed, ephemeral=True)
+                return
+        elif confirm:
+            targets = None  # The whole server
+        else:
+            embed = discord.Embed(
+                title="Error",
+                description="Provide user IDs, or set `confirm` to True to clear every warning in the server",
+                color=discord.Color.red()
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+
+        # Large cleanups run in batches and can outlast the interaction window
+        await interaction.response.defer(ephemeral=True)
+        count, expired = await clear_warnings_bulk(interaction.guild.id, targets)
+        summary = f"{count} warnings removed" if not expired else f"{count} active and {expired} expired warnings removed"
+
+        log_embed = discord.Embed(
+            title="Warnings Cleared",
+            description=f"{summary} from {len(targets)} users" if targets else f"{summary} server-wide",
+            color=discord.Color.green(),
+        )
+        log_embed.add_field(name="By", value=interaction.user.mention, inline=True)
+        await interaction.followup.send(embed=log_embed, ephemeral=True)
+
+        if count or expired:
+            await moderation_logging.log_moderation_action(self.bot, interaction.guild.id, log_embed)
+
+    @app_commands.command(name="escalation_set", description="Add or replace the automatic action taken at a number of warnings.")
+    @app_commands.describe(
+        threshold="Number of warnings that triggers the action.",
+        action="The action to take.",
+        window_hours="Only count warnings from the last this many hours. Leave empty to count every active warning.",
+        timeout_minutes="How long a timeout lasts. Defaults to 60 minutes.",
+    )
+    @app_commands.choices(action=[
+        app_commands.Choice(name="Timeout", value="timeout"),
+        app_commands.Choice(name="Kick", value="kick"),
+        app_commands.Choice(name="Ban", value="ban"),
+    ])
+    @is_admin()
+    async def escalation_set(
+        self,
+        interaction: discord.Interaction,
+        threshold: app_commands.Range[int, 1, 100],
+        action: app_commands.Choice[str],
+        window_hours: app_commands.Range[int, 1, 8760] = None,
+        timeout_minutes: app_commands.Range[int, 1, 40320] = None,
+    ):
+        """Set one step of the server's escalation ladder."""
+        if action.value != "timeout" and timeout_minutes is not None:
+            embed = discord.Embed(
+                title="Error",
+                description="A duration can only be set for timeouts",
+                color=discord.Color.red()
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+
+        await set_escalation_rule(interaction.guild.id, threshold, action.value, window_hours, timeout_minutes)
+        ladder = await get_escalation_ladder(interaction.guild.id)
+
+        embed = build_escalation_embed("Escalation Rule Set", ladder, discord.Color.green())
+        embed.add_field(name="By", value=interaction.user.mention, inline=True)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await moderation_logging.log_moderation_action(self.bot, interaction.guild.id, embed)
+
+    @app_commands.command(name="escalation_remove", description="Remove the automatic action taken at a number of warnings.")
+    @app_commands.describe(threshold="Number of warnings of the rule to remove.")
+    @is_admin()
+    async def escalation_remove(self, interaction: discord.Interaction, threshold: int):
+        """Remove one step of the server's escalation ladder."""
+        if not await remove_escalation_rule(interaction.guild.id, threshold):
+            embed = discord.Embed(
+                title="Error",
+                description=f"No escalation rule at {threshold} warnings",
+                color=discord.Color.red()
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+
+        ladder = await get_escalation_ladder(interaction.guild.id)
+        embed = build_escalation_embed("Escalation Rule Removed", ladder, discord.Color.green())
+        embed.add_field(name="By", value=interaction.user.mention, inline=True)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await moderation_logging.log_moderation_action(self.bot, interaction.guild.id, embed)
+
+    @app_commands.command(name="escalation_list", description="Show the automatic actions taken at each number of warnings.")
+    @is_mod()
+    async def escalation_list(self, interaction: discord.Interaction):
+        """Show the server's escalation ladder."""
+        ladder = await get_escalation_ladder(interaction.guild.id)
+        embed = build_escalation_embed("Escalation Rules", ladder, discord.Color.blue())
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="warning_ttl", description="Set how many days warnings stay active before they expire.")
+    @app_commands.describe(days="Days a warning counts towards the escalation rules. 0 keeps warnings active forever.")
+    @is_admin()
+    async def warning_ttl(self, interaction: discord.Interaction, days: app_commands.Range[int, 0, 3650]):
+        """Set the warning expiry for the server."""
+        await interaction.response.defer(ephemeral=True)
+        await set_warning_ttl(interaction.guild.id, days or None)
+
+        if days:
+            # Expire what is already past the new TTL instead of waiting for the next sweep
+            expired = await expire_warnings(interaction.guild.id, days)
+            embed = discord.Embed(
+                title="Warning Expiry Set",
+                description=f"Warnings now expire after {days} days",
+                color=discord.Color.green(),
+            )
+            if expired:
+                embed.add_field(name="Expired", value=f"{expired} warnings", inline=True)
+        else:
+            embed = discord.Embed(
+                title="Warning Expiry Disabled",
+                description="Warnings no longer expire. Warnings that already expired stay expired.",
+                color=discord.Color.orange(),
+            )
+        embed.add_field(name="By", value=interaction.user.mention, inline=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        await moderation_logging.log_moderation_action(self.bot, interaction.guild.id, embed)
+
     @app_commands.command(name="audit_logging", description="Enable or disable audit logging for native Discord moderation actions.")
     @app_commands.describe(enabled="Enable (True) or disable (False) audit logging.")
     @is_admin()
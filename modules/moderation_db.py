@@ -1,29 +1,33 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import declarative_base
 from sqlalchemy.future import select
-from sqlalchemy import Column, Integer, String, BigInteger, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime, Boolean, Index, update, delete, bindparam, text, func, tuple_, case, false
+from sqlalchemy.dialects.sqlite import insert
+from modules.database import get_engine, get_sessionmaker, import_legacy_database
+from modules.cache import GuildCache
+from modules.migrations import apply_migrations
 import datetime
-import os
-
-# Ensure the database folder exists
-DATABASE_FOLDER = "database"
-os.makedirs(DATABASE_FOLDER, exist_ok=True)
-
-MODERATION_DATABASE_URL = f"sqlite+aiosqlite:///{DATABASE_FOLDER}/moderation.db"
+import asyncio
 
 # Create the async engine and session for moderation configuration
-moderation_engine = create_async_engine(MODERATION_DATABASE_URL, echo=True)
-moderation_session = sessionmaker(moderation_engine, expire_on_commit=False, class_=AsyncSession)
+moderation_engine = get_engine("moderation")
+moderation_session = get_sessionmaker("moderation")
 
 # Define the base for moderation models
 ModerationBase = declarative_base()
 
+# Write-through cache of moderation configurations, warm-loaded at startup
+moderation_config_cache = GuildCache("moderation_configs")
+
+# Compiled escalation ladders per guild, warm-loaded at startup
+escalation_cache = GuildCache("escalation_rules")
+
 class ModerationConfig(ModerationBase):
     __tablename__ = "moderation_configs"
     id = Column(Integer, primary_key=True)
     guild_id = Column(BigInteger, unique=True, nullable=False)
     log_channel_id = Column(BigInteger, nullable=True)
     audit_logging_enabled = Column(Boolean, default=False, nullable=False)
+    warning_ttl_days = Column(Integer, nullable=True)  # None keeps warnings active forever
     
     __table_args__ = (
         {"sqlite_autoincrement": True},
@@ -37,6 +41,38 @@ class ModWarning(ModerationBase):
     moderator_id = Column(BigInteger, nullable=False)
     reason = Column(String, nullable=False)
     timestamp = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
+    expired = Column(Boolean, default=False, server_default=false(), nullable=False)  # Past the guild's TTL, kept for history
+
+    __table_args__ = (
+        # Active warnings are looked up and paged per member, newest first
+        Index("ix_warnings_guild_user_expired_timestamp", "guild_id", "user_id", "expired", "timestamp"),
+        # The expiry sweep scans the oldest active warnings of a guild
+        Index("ix_warnings_guild_expired_timestamp", "guild_id", "expired", "timestamp"),
+    )
+
+class WarningCount(ModerationBase):
+    __tablename__ = "warning_counts"
+    id = Column(Integer, primary_key=True)
+    guild_id = Column(BigInteger, nullable=False)
+    user_id = Column(BigInteger, nullable=False)
+    active_count = Column(Integer, nullable=False, default=0)  # Kept in step with warnings on every write
+
+    __table_args__ = (
+        Index("ix_warning_counts_guild_user", "guild_id", "user_id", unique=True),
+    )
+
+class EscalationRule(ModerationBase):
+    __tablename__ = "escalation_rules"
+    id = Column(Integer, primary_key=True)
+    guild_id = Column(BigInteger, nullable=False)
+    threshold = Column(Integer, nullable=False)  # Warnings needed to reach this step
+    action = Column(String, nullable=False)  # timeout, kick, ban
+    window_hours = Column(Integer, nullable=True)  # Only count warnings this recent, None for all active ones
+    duration_minutes = Column(Integer, nullable=True)  # Timeout length
+
+    __table_args__ = (
+        Index("ix_escalation_rules_guild_threshold", "guild_id", "threshold", unique=True),
+    )
 
 class Appeal(ModerationBase):
     __tablename__ = "appeals"
@@ -51,18 +87,87 @@ class Appeal(ModerationBase):
     timestamp = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
     message_id = Column(BigInteger, nullable=True)  # Appeal message ID in appeal channel
 
+    __table_args__ = (
+        Index("ix_appeals_guild_status_timestamp", "guild_id", "status", "timestamp"),
+        Index("ix_appeals_guild_user", "guild_id", "user_id"),
+    )
+
+async def rebuild_warning_counts(conn):
+    """Rebuild the per-member warning counts from the active warnings."""
+    # A file imported into the unified database is migrated from the start
+    # again and may already have expired warnings, which must not count
+    result = await conn.execute(text("PRAGMA table_info(warnings)"))
+    active = "WHERE expired = 0 " if "expired" in {row.name for row in result.all()} else ""
+    await conn.execute(text(
+        "INSERT OR REPLACE INTO warning_counts (guild_id, user_id, active_count) "
+        f"SELECT guild_id, user_id, COUNT(*) FROM warnings {active}GROUP BY guild_id, user_id"
+    ))
+
+async def add_warning_expiry_columns(conn):
+    """Add the warning TTL and expired columns if they are missing."""
+    result = await conn.execute(text("PRAGMA table_info(moderation_configs)"))
+    if "warning_ttl_days" not in {row.name for row in result.all()}:
+        await conn.execute(text("ALTER TABLE moderation_configs ADD COLUMN warning_ttl_days INTEGER"))
+    result = await conn.execute(text("PRAGMA table_info(warnings)"))
+    if "expired" not in {row.name for row in result.all()}:
+        await conn.execute(text("ALTER TABLE warnings ADD COLUMN expired BOOLEAN NOT NULL DEFAULT 0"))
+    await conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_warnings_guild_expired_timestamp ON warnings (guild_id, expired, timestamp)"
+    ))
+
+# Schema migrations for databases created before a change to the models.
+# New databases get the same schema from create_all; steps must be idempotent.
+MODERATION_MIGRATIONS = [
+    # 1: composite indexes for per-member warning and appeal lookups
+    [
+        "CREATE INDEX IF NOT EXISTS ix_warnings_guild_user_timestamp ON warnings (guild_id, user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_appeals_guild_status_timestamp ON appeals (guild_id, status, timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_appeals_guild_user ON appeals (guild_id, user_id)",
+    ],
+    # 2: per-member warning counts, rebuilt from the existing warnings
+    rebuild_warning_counts,
+    # 3: per-guild warning expiry
+    add_warning_expiry_columns,
+    # 4: escalation rules
+    [
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_escalation_rules_guild_threshold ON escalation_rules (guild_id, threshold)",
+    ],
+    # 5: per-member lookups skip expired warnings on the index instead of
+    # being planned onto the guild-wide expiry index
+    [
+        "CREATE INDEX IF NOT EXISTS ix_warnings_guild_user_expired_timestamp ON warnings (guild_id, user_id, expired, timestamp)",
+        "DROP INDEX IF EXISTS ix_warnings_guild_user_timestamp",
+    ],
+]
+
 async def init_moderation_db():
     """Initialize the moderation database."""
     async with moderation_engine.begin() as conn:
         await conn.run_sync(ModerationBase.metadata.create_all)
+    await import_legacy_database("moderation", ModerationBase.metadata)
+    async with moderation_engine.begin() as conn:
+        await apply_migrations(conn, "moderation", MODERATION_MIGRATIONS)
+
+async def load_moderation_config_cache():
+    """Load every moderation configuration into the in-memory cache."""
+    async with moderation_session() as session:
+        result = await session.execute(select(ModerationConfig))
+        moderation_config_cache.load(result.scalars().all())
 
 async def get_moderation_config(guild_id: int):
     """Retrieve the moderation configuration for a guild."""
+    found, config = moderation_config_cache.lookup(guild_id)
+    if found:
+        return config
+
     async with moderation_session() as session:
         result = await session.execute(
             select(ModerationConfig).where(ModerationConfig.guild_id == guild_id)
         )
-        return result.scalars().first()
+        config = result.scalars().first()
+    if config:
+        moderation_config_cache.set(guild_id, config)
+    return config
 
 async def set_moderation_log_channel(guild_id: int, log_channel_id: int):
     """Set or update the moderation log channel for a guild."""
@@ -83,6 +188,9 @@ async def set_moderation_log_channel(guild_id: int, log_channel_id: int):
             
         await session.commit()
 
+    # Keep the cache in step with the committed row
+    moderation_config_cache.set(guild_id, config)
+
 async def set_audit_logging(guild_id: int, enabled: bool):
     """Enable or disable audit logging for a guild."""
     async with moderation_session() as session:
@@ -102,17 +210,63 @@ async def set_audit_logging(guild_id: int, enabled: bool):
             
         await session.commit()
 
-async def is_audit_logging_enabled(guild_id: int) -> bool:
-    """Check if audit logging is enabled for a guild."""
+    # Keep the cache in step with the committed row
+    moderation_config_cache.set(guild_id, config)
+
+async def set_warning_ttl(guild_id: int, ttl_days: int = None):
+    """Set how many days warnings stay active in a guild, or None to never expire them."""
     async with moderation_session() as session:
         result = await session.execute(
             select(ModerationConfig).where(ModerationConfig.guild_id == guild_id)
         )
         config = result.scalars().first()
-        
+
         if config:
-            return config.audit_logging_enabled
-        return False
+            config.warning_ttl_days = ttl_days
+        else:
+            config = ModerationConfig(
+                guild_id=guild_id,
+                warning_ttl_days=ttl_days
+            )
+            session.add(config)
+
+        await session.commit()
+
+    # Keep the cache in step with the committed row
+    moderation_config_cache.set(guild_id, config)
+
+async def clear_deleted_moderation_channel(session, guild_id: int, channel_id: int):
+    """
+    Unset a deleted moderation log channel in the caller's transaction.
+    Returns the changed configuration, or None.
+    """
+    result = await session.execute(
+        select(ModerationConfig).where(
+            ModerationConfig.guild_id == guild_id,
+            ModerationConfig.log_channel_id == channel_id,
+        )
+    )
+    config = result.scalars().first()
+    if config:
+        config.log_channel_id = None
+    return config
+
+async def is_audit_logging_enabled(guild_id: int) -> bool:
+    """Check if audit logging is enabled for a guild."""
+    config = await get_moderation_config(guild_id)
+    if config:
+        return config.audit_logging_enabled
+    return False
+
+async def change_warning_count(session, guild_id: int, user_id: int, delta: int):
+    """Adjust a member's active warning count in the caller's transaction."""
+    statement = insert(WarningCount).values(guild_id=guild_id, user_id=user_id, active_count=max(delta, 0))
+    await session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["guild_id", "user_id"],
+            set_={"active_count": WarningCount.active_count + delta},
+        )
+    )
 
 async def add_warning(guild_id: int, user_id: int, moderator_id: int, reason: str):
     """Add a new warning record."""
@@ -124,21 +278,72 @@ async def add_warning(guild_id: int, user_id: int, moderator_id: int, reason: st
             reason=reason
         )
         session.add(warning)
+        await change_warning_count(session, guild_id, user_id, 1)
         await session.commit()
         await session.refresh(warning)
         return warning.id
 
-async def get_user_warnings(guild_id: int, user_id: int):
-    """Get all warnings for a user in a guild."""
+async def get_active_warning_count(guild_id: int, user_id: int) -> int:
+    """Get the number of active warnings of a user in a guild from the maintained counter."""
     async with moderation_session() as session:
         result = await session.execute(
+            select(WarningCount.active_count).where(
+                WarningCount.guild_id == guild_id,
+                WarningCount.user_id == user_id,
+            )
+        )
+        return result.scalar() or 0
+
+async def get_user_warnings(guild_id: int, user_id: int, include_expired: bool = False):
+    """Get the active warnings for a user in a guild, or all of them with include_expired."""
+    async with moderation_session() as session:
+        query = (
             select(ModWarning)
             .where(ModWarning.guild_id == guild_id)
             .where(ModWarning.user_id == user_id)
-            .order_by(ModWarning.timestamp.desc())
         )
+        if not include_expired:
+            query = query.where(ModWarning.expired == False)
+        result = await session.execute(query.order_by(ModWarning.timestamp.desc()))
         return result.scalars().all()
 
+async def get_user_warnings_page(guild_id: int, user_id: int, before=None, after=None, limit: int = 5):
+    """
+    Get one page of a user's active warnings, newest first.
+
+    Pages are keyed on (timestamp, id) rather than offsets, so every page is
+    one seek on the per-member index. Pass the (timestamp, id) of the last
+    warning shown as `before` for the next, older page, or of the first
+    warning shown as `after` for the previous, newer one.
+
+    Returns a (warnings, has_more) tuple, where has_more tells whether
+    further warnings exist in the direction that was paged.
+    """
+    query = (
+        select(ModWarning)
+        .where(ModWarning.guild_id == guild_id)
+        .where(ModWarning.user_id == user_id)
+        .where(ModWarning.expired == False)
+    )
+    key = tuple_(ModWarning.timestamp, ModWarning.id)
+    if after is not None:
+        query = query.where(key > tuple_(*after)).order_by(ModWarning.timestamp.asc(), ModWarning.id.asc())
+    else:
+        if before is not None:
+            query = query.where(key < tuple_(*before))
+        query = query.order_by(ModWarning.timestamp.desc(), ModWarning.id.desc())
+
+    async with moderation_session() as session:
+        # One extra row tells whether another page follows
+        result = await session.execute(query.limit(limit + 1))
+        warnings = result.scalars().all()
+
+    has_more = len(warnings) > limit
+    warnings = warnings[:limit]
+    if after is not None:
+        warnings.reverse()
+    return warnings, has_more
+
 async def get_warning_by_id(warning_id: int):
     """Get a specific warning by its ID."""
     async with moderation_session() as session:
@@ -151,36 +356,394 @@ async def get_warning_by_id(warning_id: int):
 async def remove_warning(warning_id: int):
     """Remove a warning by ID."""
     async with moderation_session() as session:
-        warning = await session.execute(
-            select(ModWarning)
+        # The expired flag is read from the deleted row itself, as a
+        # concurrent sweep may expire the warning at any point before
+        result = await session.execute(
+            delete(ModWarning)
             .where(ModWarning.id == warning_id)
+            .returning(ModWarning.guild_id, ModWarning.user_id, ModWarning.expired)
         )
-        warning = warning.scalars().first()
-        if warning:
-            await session.delete(warning)
-            await session.commit()
-            return True
-        return False
+        warning = result.first()
+        if warning is None:
+            return False
+        if not warning.expired:
+            await change_warning_count(session, warning.guild_id, warning.user_id, -1)
+        await session.commit()
+        return True
 
 async def clear_user_warnings(guild_id: int, user_id: int):
-    """Clear all warnings for a user in a guild."""
+    """
+    Clear all warnings for a user in a guild, active and expired.
+    Returns the numbers of (active, expired) warnings removed.
+    """
     async with moderation_session() as session:
         result = await session.execute(
-            select(ModWarning)
+            delete(ModWarning)
+            .where(ModWarning.guild_id == guild_id)
+            .where(ModWarning.user_id == user_id)
+            .where(ModWarning.expired == False)
+        )
+        count = result.rowcount
+        if count:
+            await change_warning_count(session, guild_id, user_id, -count)
+        # Expired warnings no longer count, they only go from the history
+        result = await session.execute(
+            delete(ModWarning)
             .where(ModWarning.guild_id == guild_id)
             .where(ModWarning.user_id == user_id)
         )
-        warnings = result.scalars().all()
-        
-        if not warnings:
-            return 0
-        
-        count = len(warnings)
-        for warning in warnings:
-            await session.delete(warning)
-        
         await session.commit()
-        return count
+        return count, result.rowcount
+
+async def clear_warnings_bulk(guild_id: int, user_ids=None, batch_size: int = 1000) -> tuple:
+    """
+    Clear the warnings of many users, or of a whole guild when no users are given.
+
+    Warnings are deleted in batches of `batch_size`, each in its own short
+    transaction together with the matching warning count updates, yielding
+    to the event loop in between. Returns the numbers of (active, expired)
+    warnings removed.
+    """
+    if user_ids is None:
+        user_groups = [None]
+    else:
+        # Bounded IN lists stay well under SQLite's bound parameter limit
+        user_ids = list(user_ids)
+        user_groups = [user_ids[i:i + 500] for i in range(0, len(user_ids), 500)]
+
+    removed = expired = 0
+    for users in user_groups:
+        query = select(ModWarning.id).where(ModWarning.guild_id == guild_id)
+        if users is not None:
+            query = query.where(ModWarning.user_id.in_(users))
+        query = query.limit(batch_size)
+
+        while True:
+            async with moderation_session() as session:
+                rows = (await session.execute(query)).all()
+                if not rows:
+                    break
+                # The expired flag is read from the deleted rows themselves, as
+                # a concurrent sweep may have expired some since the SELECT
+                result = await session.execute(
+                    delete(ModWarning)
+                    .where(ModWarning.id.in_([row.id for row in rows]))
+                    .returning(ModWarning.user_id, ModWarning.expired)
+                )
+                deleted = result.all()
+                active = [row for row in deleted if not row.expired]
+                await decrement_warning_counts(session, guild_id, active)
+                await session.commit()
+            removed += len(active)
+            expired += len(deleted) - len(active)
+            await asyncio.sleep(0)
+    return removed, expired
+
+async def decrement_warning_counts(session, guild_id: int, rows):
+    """Take the given warning rows off their members' counts in the caller's transaction."""
+    per_user = {}
+    for row in rows:
+        per_user[row.user_id] = per_user.get(row.user_id, 0) + 1
+    if not per_user:
+        return
+    # Core statement, so the parameter list runs as one executemany
+    counts = WarningCount.__table__
+    await session.execute(
+        update(counts)
+        .where(counts.c.guild_id == guild_id)
+        .where(counts.c.user_id == bindparam("member_id"))
+        .values(active_count=counts.c.active_count - bindparam("removed")),
+        [{"member_id": user_id, "removed": count} for user_id, count in per_user.items()],
+    )
+
+async def expire_warnings(guild_id: int, ttl_days: int, batch_size: int = 1000) -> int:
+    """
+    Mark the active warnings of a guild older than `ttl_days` as expired.
+
+    Works through the oldest warnings in batches on the expiry index, each in
+    its own short transaction with the matching count updates. Returns the
+    number of warnings expired.
+    """
+    cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=ttl_days)
+    query = (
+        select(ModWarning.id, ModWarning.user_id)
+        .where(ModWarning.guild_id == guild_id)
+        .where(ModWarning.expired == False)
+        .where(ModWarning.timestamp < cutoff)
+        .limit(batch_size)
+    )
+
+    expired = 0
+    while True:
+        async with moderation_session() as session:
+            rows = (await session.execute(query)).all()
+            if not rows:
+                break
+            # A concurrent sweep may have expired some of these rows since the
+            # SELECT, so only the rows this UPDATE changes come off the counts
+            result = await session.execute(
+                update(ModWarning)
+                .where(ModWarning.id.in_([row.id for row in rows]))
+                .where(ModWarning.expired == False)
+                .values(expired=True)
+                .returning(ModWarning.user_id)
+                .execution_options(synchronize_session=False)
+            )
+            changed = result.all()
+            await decrement_warning_counts(session, guild_id, changed)
+            await session.commit()
+        expired += len(changed)
+        await asyncio.sleep(0)
+    return expired
+
+class WarningExpirySweeper:
+    """
+    Periodically expires warnings in every guild with a warning TTL.
+
+    Expiry is swept rather than checked on read so the maintained counts stay
+    the single source for the escalation check. A warning can stay active for
+    up to `interval` seconds past its TTL.
+    """
+
+    def __init__(self, interval: float = 600.0):
+        self.interval = interval
+        self._task = None
+
+    def start(self):
+        """Start sweeping periodically in the background, once per process."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def sweep(self) -> int:
+        """Expire warnings in every guild with a TTL. Returns the number expired."""
+        async with moderation_session() as session:
+            result = await session.execute(
+                select(ModerationConfig.guild_id, ModerationConfig.warning_ttl_days)
+                .where(ModerationConfig.warning_ttl_days != None)
+            )
+            guilds = result.all()
+
+        expired = 0
+        for guild_id, ttl_days in guilds:
+            expired += await expire_warnings(guild_id, ttl_days)
+        return expired
+
+    async def _run(self):
+        while True:
+            try:
+                expired = await self.sweep()
+                if expired:
+                    print(f"Moderation: Expired {expired} warnings")
+            except Exception as e:
+                print(f"Moderation: Warning expiry sweep failed: {e}")
+            await asyncio.sleep(self.interval)
+
+# Shared sweeper for warning expiry
+warning_expiry = WarningExpirySweeper()
+
+# Escalation actions from least to most severe
+ESCALATION_ACTIONS = ("timeout", "kick", "ban")
+
+class EscalationLadder:
+    """
+    A guild's escalation rules compiled for lookup by warning count.
+
+    Rules are grouped by their time window. For every window, `steps` maps a
+    threshold to its rule, so a lower rule fires once, on the warning that
+    brings the window's count to its threshold, and not again on every
+    warning after it. The top rule, the most severe one, keeps firing at and
+    above its threshold, so members already past it, or whose last action
+    failed, still end up there. Evaluating a warning is one dict lookup per
+    distinct window.
+    """
+
+    def __init__(self, guild_id: int, rules):
+        self.guild_id = guild_id
+        self.rules = sorted(rules, key=lambda rule: (rule.threshold, rule.window_hours or 0))
+        self.steps = {}
+        for rule in self.rules:
+            self.steps.setdefault(rule.window_hours, {})[rule.threshold] = rule
+        # The most severe step, at its lowest threshold, whose threshold is
+        # shown next to a member's warnings, e.g. 2/3
+        self.top = max(
+            self.rules,
+            key=lambda rule: (ESCALATION_ACTIONS.index(rule.action), -rule.threshold),
+            default=None,
+        )
+        self.limit = self.top.threshold if self.top else 0
+
+    @property
+    def windows(self) -> list:
+        """Return the distinct time windows, in hours, with None for all active warnings."""
+        return list(self.steps)
+
+    @staticmethod
+    def _most_severe(rules):
+        return max(
+            rules,
+            key=lambda rule: (ESCALATION_ACTIONS.index(rule.action), rule.threshold),
+            default=None,
+        )
+
+    def match(self, counts: dict):
+        """
+        Return the rule to apply for the given {window_hours: warning count}, or None.
+
+        A rule matches when its window's count is exactly its threshold, and
+        the top rule also when the count is above it. When rules in several
+        windows match, the most severe action wins.
+        """
+        rules = [
+            steps[counts[window]]
+            for window, steps in self.steps.items()
+            if counts.get(window, 0) in steps
+        ]
+        if self.top and counts.get(self.top.window_hours, 0) > self.top.threshold:
+            rules.append(self.top)
+        return self._most_severe(rules)
+
+    @staticmethod
+    def without_warning(counts: dict, timestamp: datetime.datetime) -> dict:
+        """
+        Return the given {window_hours: warning count} with one active warning
+        from `timestamp` taken off every window that contains it.
+        """
+        if timestamp.tzinfo is None:
+            # SQLite hands back the stored UTC timestamps without a timezone
+            timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return {
+            window: count - 1 if window is None or timestamp >= now - datetime.timedelta(hours=window) else count
+            for window, count in counts.items()
+        }
+
+    def reached(self, counts: dict):
+        """
+        Return the most severe rule whose threshold the given counts have
+        reached or passed, or None.
+        """
+        return self._most_severe(
+            rule for rule in self.rules
+            if counts.get(rule.window_hours, 0) >= rule.threshold
+        )
+
+# Used by guilds without rules of their own: ban at 3 or more active warnings
+DEFAULT_ESCALATION_RULES = [
+    EscalationRule(threshold=3, action="ban", window_hours=None, duration_minutes=None),
+]
+
+async def load_escalation_cache():
+    """Compile every guild's escalation rules into the in-memory cache."""
+    async with moderation_session() as session:
+        result = await session.execute(select(EscalationRule))
+        rules = {}
+        for rule in result.scalars().all():
+            rules.setdefault(rule.guild_id, []).append(rule)
+    escalation_cache.load(
+        [EscalationLadder(guild_id, guild_rules) for guild_id, guild_rules in rules.items()],
+        key=lambda ladder: ladder.guild_id,
+    )
+
+async def compile_escalation_rules(guild_id: int) -> EscalationLadder:
+    """Compile a guild's escalation rules from the database and cache the result."""
+    async with moderation_session() as session:
+        result = await session.execute(
+            select(EscalationRule).where(EscalationRule.guild_id == guild_id)
+        )
+        rules = result.scalars().all()
+    if rules:
+        ladder = EscalationLadder(guild_id, rules)
+        escalation_cache.set(guild_id, ladder)
+    else:
+        ladder = None
+        escalation_cache.discard(guild_id)
+    return ladder
+
+async def get_escalation_ladder(guild_id: int) -> EscalationLadder:
+    """Get the compiled escalation ladder of a guild, falling back to the default one."""
+    found, ladder = escalation_cache.lookup(guild_id)
+    if not found:
+        ladder = await compile_escalation_rules(guild_id)
+    return ladder or EscalationLadder(guild_id, DEFAULT_ESCALATION_RULES)
+
+async def set_escalation_rule(guild_id: int, threshold: int, action: str, window_hours: int = None, duration_minutes: int = None):
+    """Add or replace the escalation rule of a guild at a warning threshold."""
+    async with moderation_session() as session:
+        result = await session.execute(
+            select(EscalationRule)
+            .where(EscalationRule.guild_id == guild_id)
+            .where(EscalationRule.threshold == threshold)
+        )
+        rule = result.scalars().first()
+
+        if rule:
+            rule.action = action
+            rule.window_hours = window_hours
+            rule.duration_minutes = duration_minutes
+        else:
+            session.add(EscalationRule(
+                guild_id=guild_id,
+                threshold=threshold,
+                action=action,
+                window_hours=window_hours,
+                duration_minutes=duration_minutes
+            ))
+
+        await session.commit()
+
+    await compile_escalation_rules(guild_id)
+
+async def remove_escalation_rule(guild_id: int, threshold: int) -> bool:
+    """Remove the escalation rule of a guild at a warning threshold."""
+    async with moderation_session() as session:
+        result = await session.execute(
+            delete(EscalationRule)
+            .where(EscalationRule.guild_id == guild_id)
+            .where(EscalationRule.threshold == threshold)
+        )
+        await session.commit()
+
+    await compile_escalation_rules(guild_id)
+    return result.rowcount > 0
+
+async def get_escalation_counts(guild_id: int, user_id: int, active_count: int, ladder: EscalationLadder = None) -> dict:
+    """
+    Return a member's warning counts as {window_hours: count} for the windows
+    of a guild's escalation ladder.
+
+    `active_count` is the member's maintained warning count. The windowed
+    counts are summed in one query over the member's active warnings.
+    """
+    ladder = ladder or await get_escalation_ladder(guild_id)
+    counts = {None: active_count}
+    windows = [window for window in ladder.windows if window is not None]
+    if windows:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        async with moderation_session() as session:
+            result = await session.execute(
+                select(*[
+                    func.sum(case((ModWarning.timestamp >= now - datetime.timedelta(hours=window), 1), else_=0))
+                    for window in windows
+                ])
+                .where(ModWarning.guild_id == guild_id)
+                .where(ModWarning.user_id == user_id)
+                .where(ModWarning.timestamp >= now - datetime.timedelta(hours=max(windows)))
+                .where(ModWarning.expired == False)
+            )
+            for window, count in zip(windows, result.one()):
+                counts[window] = count or 0
+    return counts
+
+async def get_escalation_step(guild_id: int, user_id: int, active_count: int):
+    """
+    Return the escalation rule a member's latest warning triggers, or None.
+
+    `active_count` is the member's maintained warning count, including the
+    latest warning.
+    """
+    ladder = await get_escalation_ladder(guild_id)
+    counts = await get_escalation_counts(guild_id, user_id, active_count, ladder)
+    return ladder.match(counts)
 
 async def create_appeal(guild_id: int, user_id: int, ban_reason: str, appeal_reason: str, message_id: int = None):
     """Create a new appeal."""
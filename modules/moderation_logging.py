@@ -1,10 +1,13 @@
 import discord
 from discord.ext.commands import Bot
 from modules.moderation_db import get_moderation_config
+from modules.log_dispatcher import log_dispatcher
 
 async def log_moderation_action(bot: Bot, guild_id: int, embed: discord.Embed):
     """
     Logs a moderation event to the configured moderation log channel for the guild.
+    The embed is queued on the log dispatcher, so this returns without
+    waiting for Discord.
     Args:
         bot (Bot): The bot instance.
         guild_id (int): The ID of the guild where the event occurred.
@@ -18,7 +21,8 @@ async def log_moderation_action(bot: Bot, guild_id: int, embed: discord.Embed):
                 # Check if bot has permissions to send messages
                 permissions = log_channel.permissions_for(log_channel.guild.me)
                 if permissions.send_messages and permissions.embed_links:
-                    await log_channel.send(embed=embed)
+                    # Queued and sent in batches in the background
+                    log_dispatcher.enqueue(log_channel, embed)
                 else:
                     print(f"Missing permissions in log channel {config.log_channel_id} for guild {guild_id}")
             else:
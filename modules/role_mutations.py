@@ -0,0 +1,177 @@
+import discord
+import asyncio
+from modules.keyed_queue import KeyedQueue
+
+class RoleMutationCoalescer:
+    """
+    Central queue for member role changes.
+
+    Role additions and removals for the same member that arrive within the
+    coalescing window are merged and sent as one request. A single role
+    change is sent as its own add or remove request, which cannot touch the
+    member's other roles. Several changes are applied with one
+    `member.edit(roles=...)` call, whose role list is built from the
+    gateway-maintained member cache plus the changes this coalescer sent in
+    the last `settle` seconds, which the cache may not show yet. Member edits
+    share one rate-limit bucket per guild, so edits in a guild are sent one
+    at a time, and a 429 pauses the whole guild for its Retry-After before
+    anything else is sent there.
+    """
+
+    def __init__(self, window: float = 0.25, max_retries: int = 5, settle: float = 5.0):
+        self.window = window
+        self.settle = settle
+        self.max_retries = max_retries
+        self.requested = 0
+        self.edits = 0
+        self.rate_limited = 0
+        self._queue = KeyedQueue(self._apply_next, delay=lambda: asyncio.sleep(self.window))
+        self._guild_locks = {}
+        self._paused_until = {}
+        self._recent = {}
+        self._next_prune = 0.0
+
+    async def apply(self, member: discord.Member, add=(), remove=()):
+        """
+        Queue role changes for a member and wait until they are applied.
+
+        Raises the exception of the member edit, e.g. discord.Forbidden.
+        """
+        await self.submit(member, add, remove)
+
+    def submit(self, member: discord.Member, add=(), remove=()) -> asyncio.Future:
+        """Queue role changes for a member and return a future for their result."""
+        key = (member.guild.id, member.id)
+        # At most one entry waits per member; changes merge into it until
+        # the worker takes it
+        pending = self._queue.pending(key)
+        if pending:
+            entry = pending[0]
+        else:
+            entry = {"member": member, "add": {}, "remove": {}, "futures": []}
+            self._queue.put(key, entry)
+
+        # A later change to the same role wins over an earlier one
+        for role in add:
+            entry["remove"].pop(role.id, None)
+            entry["add"][role.id] = role
+        for role in remove:
+            entry["add"].pop(role.id, None)
+            entry["remove"][role.id] = role
+
+        future = asyncio.get_running_loop().create_future()
+        entry["futures"].append(future)
+        self.requested += 1
+        return future
+
+    def stats(self) -> dict:
+        """Return counters for queued changes and the edits they were merged into."""
+        return {
+            "requested": self.requested,
+            "edits": self.edits,
+            "coalesced": self.requested - self.edits,
+            "rate_limited": self.rate_limited,
+        }
+
+    async def _apply_next(self, key, queue: list):
+        entry = queue.pop(0)
+        try:
+            await self._edit(key, entry)
+        except Exception as e:
+            for future in entry["futures"]:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future in entry["futures"]:
+                if not future.done():
+                    future.set_result(None)
+
+    async def _edit(self, key, entry):
+        guild_id = key[0]
+        member = entry["member"]
+        changes = {role.id: (role, True) for role in entry["add"].values()}
+        changes.update({role.id: (role, False) for role in entry["remove"].values()})
+
+        if len(changes) == 1:
+            # Adding or removing one role leaves the member's other roles alone
+            (role, added), = changes.values()
+            await self._send(guild_id, lambda: member.add_roles(role) if added else member.remove_roles(role))
+            self._remember(key, changes)
+            return
+
+        # member.edit replaces the whole role list. The cache is updated by
+        # the gateway, but may not show this coalescer's latest changes yet.
+        cached = member.guild.get_member(member.id) or member
+        current = {role.id: role for role in cached.roles[1:]}  # Skip @everyone
+        for role_id, (role, added) in self._recent_changes(key).items():
+            if added:
+                current[role_id] = role
+            else:
+                current.pop(role_id, None)
+        roles = dict(current)
+        for role_id, (role, added) in changes.items():
+            if added:
+                roles[role_id] = role
+            else:
+                roles.pop(role_id, None)
+        if roles.keys() == current.keys():
+            return
+        await self._send(guild_id, lambda: member.edit(roles=list(roles.values())))
+        self._remember(key, changes)
+
+    def _recent_changes(self, key) -> dict:
+        """Return {role_id: (role, added)} sent for a member within the last `settle` seconds."""
+        now = asyncio.get_running_loop().time()
+        return {
+            role_id: (role, added)
+            for role_id, (role, added, expires) in self._recent.get(key, {}).items()
+            if expires > now
+        }
+
+    def _remember(self, key, changes: dict):
+        now = asyncio.get_running_loop().time()
+        if now >= self._next_prune:
+            # Drop members whose changes the gateway has long since delivered
+            stale = [
+                member_key for member_key, recent in self._recent.items()
+                if max(expires for _, _, expires in recent.values()) <= now
+            ]
+            for member_key in stale:
+                del self._recent[member_key]
+            self._next_prune = now + self.settle
+        recent = self._recent.setdefault(key, {})
+        for role_id, (role, added) in changes.items():
+            recent[role_id] = (role, added, now + self.settle)
+
+    async def _send(self, guild_id: int, request):
+        """Send a member edit, retrying on 429s after pausing the guild."""
+        lock = self._guild_locks.setdefault(guild_id, asyncio.Lock())
+        async with lock:
+            delay = 1.0
+            for attempt in range(self.max_retries):
+                await self._wait_for_guild(guild_id)
+                try:
+                    await request()
+                    self.edits += 1
+                    return
+                except discord.HTTPException as e:
+                    if e.status != 429 or attempt == self.max_retries - 1:
+                        raise
+                    self.rate_limited += 1
+                    retry_after = e.response.headers.get("Retry-After") if e.response is not None else None
+                    pause = float(retry_after) if retry_after else delay
+                    print(f"RoleMutations: Rate limited in guild {guild_id}, pausing for {pause:.2f}s")
+                    self._paused_until[guild_id] = asyncio.get_running_loop().time() + pause
+                    delay *= 2
+
+    async def _wait_for_guild(self, guild_id: int):
+        paused_until = self._paused_until.get(guild_id)
+        if paused_until is None:
+            return
+        remaining = paused_until - asyncio.get_running_loop().time()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+        self._paused_until.pop(guild_id, None)
+
+# Shared coalescer used for every role change the bot makes
+role_mutations = RoleMutationCoalescer()
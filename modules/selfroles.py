@@ -7,106 +7,430 @@ from modules.selfroles_db import (
     set_selfrole_config,
     delete_selfrole_config,
     get_all_selfrole_configs,
+    get_selfrole_roles,
+    load_selfrole_cache,
+    resolved_selfrole_cache,
+    get_selfrole_messages,
+    record_selfrole_message,
+    delete_selfrole_messages,
+    get_selfrole_config_by_id,
+    get_selfrole_usage,
+    selfrole_usage,
     init_selfrole_db,
 )
-import json
+from modules.startup import readiness
+from modules.role_mutations import role_mutations
+from modules.metrics import Histogram
+from modules.message_refresher import refresh_messages
+import asyncio
+import time
+
+
+async def resolve_selfrole_config(guild: discord.Guild, config):
+    """
+    Resolve the roles of a self-role config against its guild.
+
+    Returns a ([(role, label)], [missing]) tuple, cached until the config or
+    one of the guild's roles is changed.
+    """
+    key = (guild.id, config.message_name)
+    found, resolved = resolved_selfrole_cache.lookup(key)
+    if found:
+        return resolved
+
+    roles_and_labels_parsed = []
+    missing_roles = []
+    roles = await get_selfrole_roles(config.id) or {}
+    for role_id, label in roles.items():
+        role = guild.get_role(role_id)
+        if role:
+            roles_and_labels_parsed.append((role, label))
+        else:
+            missing_roles.append(f"{label} (ID: {role_id})")
+
+    resolved_selfrole_cache.set(key, (roles_and_labels_parsed, missing_roles))
+    return roles_and_labels_parsed, missing_roles
+
+
+# Per-stage latency of self-role menu interactions: acknowledging the
+# interaction, applying the role change, and sending the result followup
+selfrole_latency = {
+    "ack": Histogram(),
+    "apply": Histogram(),
+    "followup": Histogram(),
+}
+
+# Background role changes still in progress, kept referenced until done
+selfrole_tasks = set()
+
+
+async def run_selfrole_change(interaction: discord.Interaction, change, *args):
+    """
+    Acknowledge a self-role interaction right away and apply the change in the background.
+
+    Role edits can wait on Discord rate limits for longer than the 3-second
+    interaction window, so the interaction is deferred first. `change` is a
+    coroutine function returning the result embed, which is sent as a followup.
+    """
+    start = time.perf_counter()
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    selfrole_latency["ack"].observe((time.perf_counter() - start) * 1000)
+
+    task = asyncio.create_task(apply_selfrole_change(interaction, change, *args))
+    selfrole_tasks.add(task)
+    task.add_done_callback(selfrole_tasks.discard)
+
+
+async def apply_selfrole_change(interaction: discord.Interaction, change, *args):
+    start = time.perf_counter()
+    try:
+        embed = await change(interaction, *args)
+    except discord.Forbidden:
+        embed = discord.Embed(
+            title="Error",
+            description="Missing permission: Manage Roles",
+            color=discord.Color.red(),
+        )
+    except Exception as e:
+        embed = discord.Embed(
+            title="Error",
+            description=f"Unexpected error: {e}",
+            color=discord.Color.red(),
+        )
+    selfrole_latency["apply"].observe((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    try:
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    except discord.HTTPException as e:
+        print(f"SelfRoles: Failed to send result to {interaction.user.id}: {e}")
+    selfrole_latency["followup"].observe((time.perf_counter() - start) * 1000)
+
+
+async def toggle_selfrole(interaction: discord.Interaction, selected_role_id: int, config_id: int = None) -> discord.Embed:
+    """
+    Add or remove a selected self-role for the member who clicked the menu.
+    Changes are counted for usage statistics when the menu's config is known.
+    """
+    role = interaction.guild.get_role(selected_role_id)
+    member = interaction.user
+
+    # Check if role still exists
+    if not role:
+        return discord.Embed(
+            title="Error",
+            description="Role no longer exists. Please contact an administrator.",
+            color=discord.Color.red(),
+        )
 
+    if role in member.roles:
+        # Remove the role if the user already has it
+        await role_mutations.apply(member, remove=[role])
+        if config_id is not None:
+            selfrole_usage.record(interaction.guild.id, config_id, role.id, added=False)
+        return discord.Embed(
+            title="Role Removed",
+            description=f"Removed {role.name}",
+            color=discord.Color.red(),
+        )
 
-class SelfRoleDropdown(Select):
-    def __init__(self, roles_and_labels: list[tuple[discord.Role, str]]):
-        options = [
-            discord.SelectOption(label=label, value=str(role.id))
-            for role, label in roles_and_labels
-        ]
-        super().__init__(placeholder="Select a role...", options=options, custom_id="selfrole_dropdown")
+    # Add the role if the user doesn't have it
+    await role_mutations.apply(member, add=[role])
+    if config_id is not None:
+        selfrole_usage.record(interaction.guild.id, config_id, role.id, added=True)
+    return discord.Embed(
+        title="Role Added",
+        description=f"Added {role.name}",
+        color=discord.Color.green(),
+    )
+
+
+async def apply_selfrole_selection(interaction: discord.Interaction, menu_role_ids, selected_role_ids: set, config_id: int) -> discord.Embed:
+    """
+    Make the member's roles from a multi-select menu match the selection.
+
+    Menu roles that were selected are added and menu roles that were left out
+    are removed, in a single member edit. Roles outside the menu are kept.
+    """
+    guild = interaction.guild
+    member = interaction.user
+    menu_roles = {role_id for role_id in menu_role_ids if guild.get_role(role_id)}
+    current = {role.id for role in member.roles[1:]}  # Skip @everyone
+    added = (selected_role_ids & menu_roles) - current
+    removed = (menu_roles & current) - selected_role_ids
+
+    if not added and not removed:
+        return discord.Embed(
+            title="No Changes",
+            description="You already have the selected roles.",
+            color=discord.Color.blue(),
+        )
+
+    await role_mutations.apply(
+        member,
+        add=[guild.get_role(role_id) for role_id in added],
+        remove=[guild.get_role(role_id) for role_id in removed],
+    )
+    for role_id in added:
+        selfrole_usage.record(guild.id, config_id, role_id, added=True)
+    for role_id in removed:
+        selfrole_usage.record(guild.id, config_id, role_id, added=False)
+
+    embed = discord.Embed(
+        title="Roles Updated",
+        color=discord.Color.green(),
+    )
+    if added:
+        embed.add_field(name="Added", value=", ".join(guild.get_role(role_id).name for role_id in added), inline=False)
+    if removed:
+        embed.add_field(name="Removed", value=", ".join(guild.get_role(role_id).name for role_id in removed), inline=False)
+    return embed
+
+
+class SelfRoleDropdown(discord.ui.DynamicItem[Select], template=r"selfrole:(?P<guild_id>[0-9]+):(?P<config_id>[0-9]+)"):
+    """
+    Self-role menu resolved from its custom_id.
+
+    The custom_id carries the guild and config ID, so one handler registered
+    with `bot.add_dynamic_items` serves every self-role message and no view
+    has to be kept in memory per message.
+    """
+
+    def __init__(self, guild_id: int, config_id: int, options: list[discord.SelectOption], multi_select: bool = False):
+        if multi_select:
+            # Members pick any subset of the roles, including none
+            select = Select(
+                placeholder="Select your roles...",
+                options=options,
+                min_values=0,
+                max_values=len(options),
+                custom_id=f"selfrole:{guild_id}:{config_id}",
+            )
+        else:
+            select = Select(
+                placeholder="Select a role...",
+                options=options,
+                custom_id=f"selfrole:{guild_id}:{config_id}",
+            )
+        super().__init__(select)
+        self.guild_id = guild_id
+        self.config_id = config_id
+        self.multi_select = multi_select
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: Select, match):
+        # Single-select menus always require one value
+        return cls(int(match["guild_id"]), int(match["config_id"]), item.options, multi_select=item.min_values == 0)
 
     async def callback(self, interaction: discord.Interaction):
-        selected_role_id = int(self.values[0])  # Get the selected role ID
-        role = interaction.guild.get_role(selected_role_id)
-        member = interaction.user
+        roles = await get_selfrole_roles(self.config_id)
+        selected_role_ids = {int(value) for value in self.item.values}
 
-        # Check if role still exists
-        if not role:
+        # Only roles that are still part of the configuration can be assigned
+        if self.guild_id != interaction.guild.id or not roles or not selected_role_ids <= roles.keys():
             embed = discord.Embed(
                 title="Error",
-                description="Role no longer exists. Please contact an administrator.",
+                description="This self-role menu is outdated. Please contact an administrator.",
                 color=discord.Color.red(),
             )
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
 
-        try:
-            if role in member.roles:
-                # Remove the role if the user already has it
-                await member.remove_roles(role)
-                embed = discord.Embed(
-                    title="Role Removed",
-                    description=f"Removed {role.name}",
-                    color=discord.Color.red(),
-                )
-            else:
-                # Add the role if the user doesn't have it
-                await member.add_roles(role)
-                embed = discord.Embed(
-                    title="Role Added",
-                    description=f"Added {role.name}",
-                    color=discord.Color.green(),
-                )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
-        except discord.Forbidden:
-            embed = discord.Embed(
-                title="Error",
-                description="Missing permission: Manage Roles",
-                color=discord.Color.red(),
-            )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
-        except Exception as e:
-            embed = discord.Embed(
-                title="Error",
-                description=f"Unexpected error: {e}",
-                color=discord.Color.red(),
-            )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+        if self.multi_select:
+            await run_selfrole_change(interaction, apply_selfrole_selection, roles.keys(), selected_role_ids, self.config_id)
+        else:
+            await run_selfrole_change(interaction, toggle_selfrole, int(self.item.values[0]), self.config_id)
+
+
+class LegacySelfRoleDropdown(discord.ui.DynamicItem[Select], template=r"selfrole_dropdown"):
+    """Handles menus sent before custom_ids carried the config ID."""
+
+    def __init__(self, options: list[discord.SelectOption]):
+        super().__init__(Select(placeholder="Select a role...", options=options, custom_id="selfrole_dropdown"))
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: Select, match):
+        return cls(item.options)
+
+    async def callback(self, interaction: discord.Interaction):
+        await run_selfrole_change(interaction, toggle_selfrole, int(self.item.values[0]))
 
 
 class SelfRolesView(View):
-    def __init__(self, roles_and_labels: list[tuple[discord.Role, str]]):
+    def __init__(self, guild_id: int, config_id: int, roles_and_labels: list[tuple[discord.Role, str]], multi_select: bool = False):
         super().__init__(timeout=None)  # Persistent view
-        self.add_item(SelfRoleDropdown(roles_and_labels))
+        options = [
+            discord.SelectOption(label=label, value=str(role.id))
+            for role, label in roles_and_labels
+        ]
+        self.add_item(SelfRoleDropdown(guild_id, config_id, options, multi_select))
+
+
+async def build_selfrole_message(guild: discord.Guild, config):
+    """
+    Build the embed and view of a self-role menu.
+    Returns (embed, view), or None when none of the configured roles exist.
+    """
+    roles_and_labels_parsed, missing_roles = await resolve_selfrole_config(guild, config)
+    if not roles_and_labels_parsed:
+        return None
+
+    embed = discord.Embed(
+        title=config.embed_title,
+        description=config.embed_description,
+        color=discord.Color.blue(),
+    )
+    for role, label in roles_and_labels_parsed:
+        embed.add_field(name=label, value=f"Role: {role.mention} (ID: {role.id})", inline=False)
+
+    if missing_roles:
+        embed.set_footer(text=f"⚠️ Warning: {len(missing_roles)} role(s) no longer exist and were skipped")
+
+    view = SelfRolesView(guild.id, config.id, roles_and_labels_parsed, config.multi_select)
+    return embed, view
+
+
+async def deploy_selfrole_menu(config, channel: discord.TextChannel, message_id: int = None) -> str:
+    """
+    Post a self-role menu to a channel, or edit the posted menu `message_id`.
+    Returns "posted", "edited", or a short failure reason.
+    """
+    message = await build_selfrole_message(channel.guild, config)
+    if not message:
+        return "no valid roles"
+    embed, view = message
+
+    try:
+        if message_id:
+            try:
+                await channel.get_partial_message(message_id).edit(embed=embed, view=view)
+                return "edited"
+            except discord.NotFound:
+                pass  # The menu was deleted, post a new one
+
+        posted = await channel.send(embed=embed, view=view)
+    except discord.Forbidden:
+        return "missing permissions"
+    except discord.HTTPException as e:
+        return f"error: {e}"
+
+    try:
+        await record_selfrole_message(config.id, channel.guild.id, channel.id, posted.id)
+    except Exception as e:
+        # The menu is live, it just won't be edited in place by later deploys
+        print(f"SelfRoles: Failed to record menu {posted.id} in channel {channel.id}: {e}")
+        return "posted, but not recorded"
+    return "posted"
+
+
+async def deploy_selfrole_menus(targets, edit_existing: bool = True, concurrency: int = 5) -> list:
+    """
+    Deploy self-role menus to many channels at once.
+
+    Args:
+        targets: (config, channel) pairs. Channels can be in different guilds,
+            each paired with its own guild's config.
+        edit_existing (bool): Edit menus already posted in place instead of
+            posting new ones.
+        concurrency (int): Maximum number of sends and edits in flight.
+            discord.py queues requests per route bucket on top of this.
+
+    Returns a list of (channel, result) tuples in the order of `targets`.
+    """
+    # Posted menus are looked up once per config rather than once per channel
+    posted = {}
+    if edit_existing:
+        for config, _ in targets:
+            if config.id not in posted:
+                posted[config.id] = await get_selfrole_messages(config.id)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def deploy(config, channel):
+        async with semaphore:
+            message_id = posted.get(config.id, {}).get(channel.id)
+            try:
+                return channel, await deploy_selfrole_menu(config, channel, message_id)
+            except Exception as e:
+                # One failing target must not lose the results of the others
+                print(f"SelfRoles: Failed to deploy to channel {channel.id}: {e}")
+                return channel, f"error: {e}"
+
+    return await asyncio.gather(*(deploy(config, channel) for config, channel in targets))
+
+
+async def refresh_selfrole_menus(bot, config) -> dict:
+    """Edit every posted menu of a self-role config to match the config."""
+    messages = await get_selfrole_messages(config.id)
+
+    async def build(channel):
+        return await build_selfrole_message(channel.guild, config)
+
+    results = await refresh_messages(bot, messages.items(), build)
+    if results["missing"]:
+        # Deleted menus are forgotten rather than re-posted
+        await delete_selfrole_messages(config.id, [channel_id for channel_id, _ in results["missing"]])
+    return results
+
+
+def deployment_summary(results: list) -> discord.Embed:
+    """Summarize the results of deploy_selfrole_menus in an embed."""
+    posted = sum(1 for _, result in results if result.startswith("posted"))
+    edited = sum(1 for _, result in results if result == "edited")
+    failed = [f"{channel.mention}: {result}" for channel, result in results if not result.startswith("posted") and result != "edited"]
+    unrecorded = [channel.mention for channel, result in results if result == "posted, but not recorded"]
+
+    embed = discord.Embed(
+        title="Self-Roles Deployed",
+        description=f"Posted: {posted}\nEdited: {edited}\nFailed: {len(failed)}",
+        color=discord.Color.green() if not failed and not unrecorded else discord.Color.orange(),
+    )
+    if failed:
+        embed.add_field(name="Failures", value="\n".join(failed)[:1024], inline=False)
+    if unrecorded:
+        embed.add_field(name="Posted but not recorded, won't be updated in place", value=", ".join(unrecorded)[:1024], inline=False)
+    return embed
 
 
 class SelfRoles(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # One handler for every self-role menu, however many messages exist
+        bot.add_dynamic_items(SelfRoleDropdown, LegacySelfRoleDropdown)
+        readiness.add_phase("selfrole_cache", load_selfrole_cache)
+        # Config ID -> whether another refresh was requested while one runs
+        self.refreshing = {}
+        self.refresh_tasks = set()
         print("SelfRoles cog loaded.")  # Print message when the cog is loaded
 
-    @commands.Cog.listener()
-    async def on_ready(self):
-        """Register persistent views for self-roles on bot startup."""
-        print("SelfRoles Cog: Registering persistent views...")
-        
-        # Get all guilds the bot is in
-        for guild in self.bot.guilds:
-            configs = await get_all_selfrole_configs(guild.id)
-            
-            for config in configs:
-                roles_and_labels = json.loads(config.roles_and_labels)
-                roles_and_labels_parsed = []
-                
-                for role_id, label in roles_and_labels.items():
-                    role = guild.get_role(int(role_id))
-                    if role:
-                        roles_and_labels_parsed.append((role, label))
-                    else:
-                        print(f"SelfRoles Cog: Skipping deleted role {role_id} in {config.message_name}")
-                
-                if roles_and_labels_parsed:
-                    # Create the view and register it globally
-                    view = SelfRolesView(roles_and_labels_parsed)
-                    self.bot.add_view(view)  # Register the persistent view globally
-                    print(f"SelfRoles Cog: Registered view for {config.message_name} in guild {guild.name}")
-                else:
-                    print(f"SelfRoles Cog: No valid roles for {config.message_name} in guild {guild.name}")
+    async def cog_load(self):
+        selfrole_usage.start()
+
+    def schedule_menu_refresh(self, config_id: int):
+        """Refresh the posted menus of a config in the background, once at a time per config."""
+        if config_id in self.refreshing:
+            self.refreshing[config_id] = True  # Run again once the current refresh ends
+            return
+        self.refreshing[config_id] = False
+        task = asyncio.create_task(self.refresh_menus(config_id))
+        self.refresh_tasks.add(task)
+        task.add_done_callback(self.refresh_tasks.discard)
+
+    async def refresh_menus(self, config_id: int):
+        try:
+            while True:
+                config = await get_selfrole_config_by_id(config_id)
+                if config:
+                    results = await refresh_selfrole_menus(self.bot, config)
+                    if results["edited"] or results["missing"]:
+                        print(f"SelfRoles: Refreshed menus of {config.message_name}: {results['edited']} edited, {len(results['missing'])} gone")
+                if not self.refreshing[config_id]:
+                    break
+                self.refreshing[config_id] = False
+        except Exception as e:
+            print(f"SelfRoles: Failed to refresh menus of config {config_id}: {e}")
+        finally:
+            del self.refreshing[config_id]
 
     @app_commands.command(name="set_selfroles", description="Configure self-assignable roles for the server.")
     @app_commands.describe(
@@ -114,6 +438,7 @@ class SelfRoles(commands.Cog):
         roles_and_labels="Provide role IDs and labels in the format role_id:label, separated by spaces.",
         embed_title="The title of the embed message.",
         embed_description="The description of the embed message.",
+        multi_select="Let members pick several roles at once instead of toggling one at a time.",
     )
     @app_commands.checks.has_permissions(administrator=True)
     async def set_selfroles(
@@ -123,6 +448,7 @@ class SelfRoles(commands.Cog):
         roles_and_labels: str,
         embed_title: str = "Self-Assignable Roles",
         embed_description: str = "Select a role from the dropdown menu below.",
+        multi_select: bool = False,
     ):
         """
         Slash command to configure self-assignable roles.
@@ -157,15 +483,19 @@ class SelfRoles(commands.Cog):
             return
 
         # Save the configuration to the database
-        await set_selfrole_config(
+        config = await set_selfrole_config(
             interaction.guild.id,
             message_name,
             roles_and_labels_parsed,
             "primary",  # Button color is no longer used
             embed_title,
             embed_description,
+            multi_select,
         )
 
+        # Update menus already posted for this configuration in place
+        self.schedule_menu_refresh(config.id)
+
         # Notify the user
         embed = discord.Embed(
             title="Success",
@@ -199,20 +529,11 @@ class SelfRoles(commands.Cog):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
 
-        # Parse the roles and labels from the configuration
-        roles_and_labels = json.loads(config.roles_and_labels)
-        roles_and_labels_parsed = []
-        missing_roles = []
-        
-        for role_id, label in roles_and_labels.items():
-            role = interaction.guild.get_role(int(role_id))
-            if role:
-                roles_and_labels_parsed.append((role, label))
-            else:
-                missing_roles.append(f"{label} (ID: {role_id})")
-        
+        # Build the menu from the configured roles
+        message = await build_selfrole_message(interaction.guild, config)
+
         # Check if any roles are still valid
-        if not roles_and_labels_parsed:
+        if not message:
             embed = discord.Embed(
                 title="Error",
                 description=f"No valid roles found for {message_name}. All configured roles have been deleted.",
@@ -220,24 +541,11 @@ class SelfRoles(commands.Cog):
             )
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
+        embed, view = message
 
-        # Create the embed for the self-roles message
-        embed = discord.Embed(
-            title=config.embed_title,
-            description=config.embed_description,
-            color=discord.Color.blue(),
-        )
-        for role, label in roles_and_labels_parsed:
-            embed.add_field(name=label, value=f"Role: {role.mention} (ID: {role.id})", inline=False)
-        
-        if missing_roles:
-            embed.set_footer(text=f"⚠️ Warning: {len(missing_roles)} role(s) no longer exist and were skipped")
-
-        # Create the view with the dropdown menu
-        view = SelfRolesView(roles_and_labels_parsed)
-
-        # Send the message to the specified channel
-        await channel.send(embed=embed, view=view)
+        # Send the message to the specified channel and remember it for redeploys
+        posted = await channel.send(embed=embed, view=view)
+        await record_selfrole_message(config.id, interaction.guild.id, channel.id, posted.id)
 
         # Notify the user that the message was sent
         embed = discord.Embed(
@@ -247,8 +555,108 @@ class SelfRoles(commands.Cog):
         )
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
-        # Register the view globally to make it persistent
-        self.bot.add_view(view)
+    @app_commands.command(name="deploy_selfroles", description="Post or update a self-roles message in several channels.")
+    @app_commands.describe(
+        message_name="The name of the self-role message to deploy.",
+        channels="The channels to deploy to, as mentions or IDs separated by spaces.",
+        edit_existing="Update messages already posted in a channel instead of posting new ones.",
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def deploy_selfroles(self, interaction: discord.Interaction, message_name: str, channels: str, edit_existing: bool = True):
+        """
+        Slash command to deploy a self-roles message to several channels of the server.
+        """
+        config = await get_selfrole_config(interaction.guild.id, message_name)
+        if not config:
+            embed = discord.Embed(
+                title="Error",
+                description=f"Configuration not found: {message_name}",
+                color=discord.Color.red(),
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+
+        targets = {}
+        for value in channels.split():
+            channel_id = value.strip("<#>")
+            channel = interaction.guild.get_channel(int(channel_id)) if channel_id.isdigit() else None
+            if not isinstance(channel, discord.TextChannel):
+                embed = discord.Embed(
+                    title="Error",
+                    description=f"Text channel not found in this server: {value}",
+                    color=discord.Color.red(),
+                )
+                await interaction.response.send_message(embed=embed, ephemeral=True)
+                return
+            targets[channel.id] = (config, channel)  # Each channel once
+
+        # Deploying to many channels can take longer than the interaction window
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        results = await deploy_selfrole_menus(list(targets.values()), edit_existing)
+        await interaction.followup.send(embed=deployment_summary(results), ephemeral=True)
+
+    @commands.command(name="deployselfroles", description="Deploy a self-roles message to channels in any server.")
+    @commands.is_owner()
+    async def deploy_selfroles_global(self, ctx, message_name: str, *channel_ids: int):
+        """
+        Owner command to deploy a self-roles message across servers. Each
+        channel gets the configuration with this name from its own server.
+        """
+        targets = []
+        skipped = []
+        for channel_id in dict.fromkeys(channel_ids):  # Each channel once
+            channel = self.bot.get_channel(channel_id)
+            config = await get_selfrole_config(channel.guild.id, message_name) if isinstance(channel, discord.TextChannel) else None
+            if config:
+                targets.append((config, channel))
+            else:
+                skipped.append(str(channel_id))
+
+        results = await deploy_selfrole_menus(targets)
+        embed = deployment_summary(results)
+        if skipped:
+            embed.add_field(name="Skipped (no channel or configuration)", value=", ".join(skipped)[:1024], inline=False)
+        await ctx.send(embed=embed)
+
+    @app_commands.command(name="selfrole_stats", description="Show how often each self-role was added or removed.")
+    @app_commands.describe(message_name="Only show this self-role message.")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def selfrole_stats(self, interaction: discord.Interaction, message_name: str = None):
+        """
+        Slash command to show self-role usage counts for the server.
+        """
+        configs = {config.id: config for config in await get_all_selfrole_configs(interaction.guild.id)}
+        if message_name:
+            configs = {config_id: config for config_id, config in configs.items() if config.message_name == message_name}
+
+        usage = {}
+        for config_id, role_id, adds, removes in await get_selfrole_usage(interaction.guild.id):
+            if config_id in configs:
+                usage.setdefault(config_id, []).append((role_id, adds, removes))
+
+        if not usage:
+            embed = discord.Embed(
+                title="Notice",
+                description="No self-role usage recorded yet",
+                color=discord.Color.red(),
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title="Self-Role Usage",
+            color=discord.Color.blue(),
+        )
+        for config_id, rows in usage.items():
+            roles = await get_selfrole_roles(config_id) or {}
+            rows.sort(key=lambda row: row[1] + row[2], reverse=True)  # Most used first
+            lines = [
+                f"- **{roles.get(role_id, role_id)}** (<@&{role_id}>): +{adds} / -{removes}"
+                for role_id, adds, removes in rows
+            ]
+            embed.add_field(name=configs[config_id].message_name, value="\n".join(lines)[:1024], inline=False)
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @app_commands.command(name="delete_selfroles", description="Delete a self-roles configuration.")
     @app_commands.describe(message_name="The name of the self-role message to delete.")
@@ -322,8 +730,8 @@ class SelfRoles(commands.Cog):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
 
-        # Parse the roles and labels from the configuration
-        roles_and_labels = json.loads(config.roles_and_labels)
+        # Roles and labels of the configuration, decoded once and cached
+        roles_and_labels = await get_selfrole_roles(config.id) or {}
         roles_formatted = "\n".join(
             [f"- **{label}**: <@&{role_id}>" for role_id, label in roles_and_labels.items()]
         )
@@ -335,6 +743,7 @@ class SelfRoles(commands.Cog):
         )
         embed.add_field(name="Embed Title", value=config.embed_title, inline=False)
         embed.add_field(name="Embed Description", value=config.embed_description, inline=False)
+        embed.add_field(name="Mode", value="Multi-select" if config.multi_select else "Single role toggle", inline=False)
         embed.add_field(name="Roles", value=roles_formatted, inline=False)
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -1,45 +1,147 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import declarative_base
 from sqlalchemy.future import select
-from sqlalchemy import Column, Integer, String, BigInteger
-import os
+from sqlalchemy import Column, Integer, String, Boolean, BigInteger, Index, ForeignKey, delete, text, false, exists, bindparam
+from sqlalchemy.dialects.sqlite import insert
+from modules.database import get_engine, get_sessionmaker, import_legacy_database
+from modules.migrations import apply_migrations
+from modules.cache import GuildCache
+import asyncio
 import json
 
-# Ensure the database folder exists
-DATABASE_FOLDER = "database"
-os.makedirs(DATABASE_FOLDER, exist_ok=True)
-
-SELFROLE_DATABASE_URL = f"sqlite+aiosqlite:///{DATABASE_FOLDER}/selfroles.db"
-
 # Create the async engine and session for self-role configuration
-selfrole_engine = create_async_engine(SELFROLE_DATABASE_URL, echo=True)
-selfrole_session = sessionmaker(selfrole_engine, expire_on_commit=False, class_=AsyncSession)
+selfrole_engine = get_engine("selfroles")
+selfrole_session = get_sessionmaker("selfroles")
 
 # Define the base for self-role models
 SelfRoleBase = declarative_base()
 
+# Role IDs and labels of each self-role config by config ID, warm-loaded at
+# startup so menu clicks never query the database. A deleted config is
+# dropped; once loaded, a missing config ID means the config is gone.
+selfrole_roles_cache = GuildCache("selfrole_roles")
+
+# Self-role configs by (guild_id, message_name), warm-loaded at startup
+selfrole_config_cache = GuildCache("selfrole_configs")
+
+# Roles of each config resolved against its guild, as a
+# ([(role, label)], [missing]) tuple by (guild_id, message_name). Filled by the
+# SelfRoles cog and dropped whenever the config or the guild's roles change.
+resolved_selfrole_cache = GuildCache("resolved_selfroles")
+
 class SelfRoleConfig(SelfRoleBase):
     __tablename__ = "selfrole_configs"
     id = Column(Integer, primary_key=True)
     guild_id = Column(BigInteger, nullable=False)
     message_name = Column(String, nullable=False)  # Unique name for each message
-    roles_and_labels = Column(String, nullable=False)  # Store roles and labels as a JSON string
+    roles_and_labels = Column(String, nullable=False, default="{}")  # Legacy JSON roles, moved to selfrole_options
     button_color = Column(String, nullable=False, default="primary")  # Button color (primary, secondary, success, danger)
     embed_title = Column(String, nullable=False, default="Self-Assignable Roles")  # Embed title
     embed_description = Column(String, nullable=False, default="Click the buttons below to assign or remove roles.")  # Embed description
+    multi_select = Column(Boolean, nullable=False, default=False, server_default=false())  # Members pick several roles at once
 
     __table_args__ = (
-        # Ensure unique configurations per guild and message name
+        # Configurations are looked up by guild and message name
+        Index("ix_selfrole_configs_guild_name", "guild_id", "message_name"),
         {"sqlite_autoincrement": True},
     )
 
+class SelfRoleOption(SelfRoleBase):
+    __tablename__ = "selfrole_options"
+    id = Column(Integer, primary_key=True)
+    config_id = Column(Integer, ForeignKey("selfrole_configs.id", ondelete="CASCADE"), nullable=False)
+    role_id = Column(BigInteger, nullable=False)
+    label = Column(String, nullable=False)
+    position = Column(Integer, nullable=False)  # Order of the option in the menu
+
+    __table_args__ = (
+        # Options are read per config in menu order, and pruned by role
+        Index("ix_selfrole_options_config_position", "config_id", "position"),
+        Index("ix_selfrole_options_role", "role_id"),
+    )
+
+class SelfRoleMessage(SelfRoleBase):
+    __tablename__ = "selfrole_messages"
+    id = Column(Integer, primary_key=True)
+    config_id = Column(Integer, ForeignKey("selfrole_configs.id", ondelete="CASCADE"), nullable=False)
+    guild_id = Column(BigInteger, nullable=False)
+    channel_id = Column(BigInteger, nullable=False)
+    message_id = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        # One posted menu per config and channel, so redeploys edit it in place
+        Index("ix_selfrole_messages_config_channel", "config_id", "channel_id", unique=True),
+        # Menus are forgotten by channel when it is deleted
+        Index("ix_selfrole_messages_channel", "channel_id"),
+    )
+
+class SelfRoleUsage(SelfRoleBase):
+    __tablename__ = "selfrole_usage"
+    id = Column(Integer, primary_key=True)
+    guild_id = Column(BigInteger, nullable=False)
+    config_id = Column(Integer, ForeignKey("selfrole_configs.id", ondelete="CASCADE"), nullable=False)
+    role_id = Column(BigInteger, nullable=False)
+    adds = Column(Integer, nullable=False, default=0)  # Times the role was taken from a menu
+    removes = Column(Integer, nullable=False, default=0)  # Times the role was dropped from a menu
+
+    __table_args__ = (
+        # Counters are upserted per config and role, and read per guild
+        Index("ix_selfrole_usage_config_role", "config_id", "role_id", unique=True),
+        Index("ix_selfrole_usage_guild", "guild_id"),
+    )
+
+async def move_roles_to_options(conn):
+    """Copy the JSON roles of every config into selfrole_options and clear the JSON column."""
+    result = await conn.execute(
+        text("SELECT id, roles_and_labels FROM selfrole_configs WHERE roles_and_labels != '{}'")
+    )
+    rows = result.all()
+    options = [
+        {"config_id": config_id, "role_id": int(role_id), "label": label, "position": position}
+        for config_id, roles_and_labels in rows
+        for position, (role_id, label) in enumerate(json.loads(roles_and_labels).items())
+    ]
+    if options:
+        await conn.execute(SelfRoleOption.__table__.insert(), options)
+    # Cleared in the same transaction, so a config is never converted twice
+    await conn.execute(text("UPDATE selfrole_configs SET roles_and_labels = '{}' WHERE roles_and_labels != '{}'"))
+
+async def add_multi_select_column(conn):
+    """Add the multi_select column to selfrole_configs if it is missing."""
+    result = await conn.execute(text("PRAGMA table_info(selfrole_configs)"))
+    if "multi_select" not in {row.name for row in result.all()}:
+        await conn.execute(text("ALTER TABLE selfrole_configs ADD COLUMN multi_select BOOLEAN NOT NULL DEFAULT 0"))
+
+# Schema migrations for databases created before a change to the models.
+# New databases get the same schema from create_all; steps must be idempotent.
+SELFROLE_MIGRATIONS = [
+    # 1: composite index for per-guild, per-message lookups
+    [
+        "CREATE INDEX IF NOT EXISTS ix_selfrole_configs_guild_name ON selfrole_configs (guild_id, message_name)",
+    ],
+    # 2: roles move from the JSON column to the normalized selfrole_options table
+    move_roles_to_options,
+    # 3: multi-select menus
+    add_multi_select_column,
+    # 4: posted menus are forgotten by channel
+    [
+        "CREATE INDEX IF NOT EXISTS ix_selfrole_messages_channel ON selfrole_messages (channel_id)",
+    ],
+]
+
 async def init_selfrole_db():
     """Initialize the self-role database."""
     async with selfrole_engine.begin() as conn:
         await conn.run_sync(SelfRoleBase.metadata.create_all)
+    await import_legacy_database("selfroles", SelfRoleBase.metadata)
+    async with selfrole_engine.begin() as conn:
+        await apply_migrations(conn, "selfroles", SELFROLE_MIGRATIONS)
 
 async def get_selfrole_config(guild_id: int, message_name: str):
     """Retrieve the self-role configuration for a specific guild and message name."""
+    found, config = selfrole_config_cache.lookup((guild_id, message_name))
+    if found:
+        return config
+
     async with selfrole_session() as session:
         result = await session.execute(
             select(SelfRoleConfig).where(
@@ -47,9 +149,12 @@ async def get_selfrole_config(guild_id: int, message_name: str):
                 SelfRoleConfig.message_name == message_name
             )
         )
-        return result.scalars().first()
+        config = result.scalars().first()
+    if config:
+        selfrole_config_cache.set((guild_id, message_name), config)
+    return config
 
-async def set_selfrole_config(guild_id: int, message_name: str, roles_and_labels: dict, button_color: str, embed_title: str, embed_description: str):
+async def set_selfrole_config(guild_id: int, message_name: str, roles_and_labels: dict, button_color: str, embed_title: str, embed_description: str, multi_select: bool = False):
     """Set or update the self-role configuration for a guild and message name."""
     async with selfrole_session() as session:
         # Check if a configuration already exists for the guild and message name
@@ -63,31 +168,46 @@ async def set_selfrole_config(guild_id: int, message_name: str, roles_and_labels
 
         if config:
             # Update the existing configuration
-            config.roles_and_labels = json.dumps(roles_and_labels)
             config.button_color = button_color
             config.embed_title = embed_title
             config.embed_description = embed_description
+            config.multi_select = multi_select
         else:
             # Create a new configuration if none exists
             config = SelfRoleConfig(
                 guild_id=guild_id,
                 message_name=message_name,
-                roles_and_labels=json.dumps(roles_and_labels),
+                roles_and_labels="{}",
                 button_color=button_color,
                 embed_title=embed_title,
                 embed_description=embed_description,
+                multi_select=multi_select,
             )
             session.add(config)
+            await session.flush()  # Assigns config.id
+
+        # Replace the options of the configuration
+        await session.execute(delete(SelfRoleOption).where(SelfRoleOption.config_id == config.id))
+        session.add_all(
+            SelfRoleOption(config_id=config.id, role_id=int(role_id), label=label, position=position)
+            for position, (role_id, label) in enumerate(roles_and_labels.items())
+        )
 
         # Commit the changes to the database
         await session.commit()
 
-async def get_all_selfrole_configs(guild_id: int):
-    """Retrieve all self-role configurations for a specific guild."""
+    selfrole_roles_cache.set(config.id, {int(role_id): label for role_id, label in roles_and_labels.items()})
+    selfrole_config_cache.set((guild_id, message_name), config)
+    resolved_selfrole_cache.discard((guild_id, message_name))
+    return config
+
+async def get_all_selfrole_configs(guild_id: int = None):
+    """Retrieve all self-role configurations for a specific guild, or for every guild if no guild is given."""
     async with selfrole_session() as session:
-        result = await session.execute(
-            select(SelfRoleConfig).where(SelfRoleConfig.guild_id == guild_id)
-        )
+        query = select(SelfRoleConfig)
+        if guild_id is not None:
+            query = query.where(SelfRoleConfig.guild_id == guild_id)
+        result = await session.execute(query)
         return result.scalars().all()
 
 async def delete_selfrole_config(guild_id: int, message_name: str):
@@ -102,5 +222,241 @@ async def delete_selfrole_config(guild_id: int, message_name: str):
         config = result.scalars().first()
 
         if config:
+            await session.execute(delete(SelfRoleOption).where(SelfRoleOption.config_id == config.id))
+            await session.execute(delete(SelfRoleMessage).where(SelfRoleMessage.config_id == config.id))
+            await session.execute(delete(SelfRoleUsage).where(SelfRoleUsage.config_id == config.id))
             await session.delete(config)
-            await session.commit()
\ No newline at end of file
+            await session.commit()
+            selfrole_roles_cache.discard(config.id)
+            # Pending counts would otherwise be flushed as orphan rows
+            selfrole_usage.forget(config.id)
+
+    selfrole_config_cache.discard((guild_id, message_name))
+    resolved_selfrole_cache.discard((guild_id, message_name))
+
+async def load_selfrole_cache():
+    """Load every self-role config and its decoded roles into the in-memory caches."""
+    configs = await get_all_selfrole_configs()
+    roles = {config.id: {} for config in configs}
+    async with selfrole_session() as session:
+        result = await session.execute(
+            select(SelfRoleOption.config_id, SelfRoleOption.role_id, SelfRoleOption.label)
+            .order_by(SelfRoleOption.config_id, SelfRoleOption.position)
+        )
+        for config_id, role_id, label in result.all():
+            if config_id in roles:
+                roles[config_id][role_id] = label
+    selfrole_roles_cache.load(roles.items(), key=lambda item: item[0], value=lambda item: item[1])
+    selfrole_config_cache.load(configs, key=lambda config: (config.guild_id, config.message_name))
+
+def invalidate_resolved_selfroles(guild_id: int):
+    """Drop the resolved roles of every self-role config in a guild."""
+    resolved_selfrole_cache.discard_guild(guild_id)
+
+async def get_selfrole_roles(config_id: int):
+    """Return {role_id: label} for a self-role config, or None if it no longer exists."""
+    found, roles = selfrole_roles_cache.lookup(config_id)
+    if found:
+        return roles
+
+    async with selfrole_session() as session:
+        result = await session.execute(
+            select(SelfRoleConfig.id).where(SelfRoleConfig.id == config_id)
+        )
+        roles = None
+        if result.first():
+            result = await session.execute(
+                select(SelfRoleOption.role_id, SelfRoleOption.label)
+                .where(SelfRoleOption.config_id == config_id)
+                .order_by(SelfRoleOption.position)
+            )
+            roles = dict(result.all())
+    if roles is not None:
+        selfrole_roles_cache.set(config_id, roles)
+    return roles
+
+async def clear_deleted_selfrole_role(session, role_id: int) -> set:
+    """
+    Remove a deleted role from every self-role config that offers it, in the
+    caller's transaction. Returns the IDs of the configs that changed.
+    """
+    result = await session.execute(
+        select(SelfRoleOption.config_id).where(SelfRoleOption.role_id == role_id)
+    )
+    config_ids = set(result.scalars().all())
+    if config_ids:
+        await session.execute(delete(SelfRoleOption).where(SelfRoleOption.role_id == role_id))
+        await session.execute(delete(SelfRoleUsage).where(SelfRoleUsage.role_id == role_id))
+    return config_ids
+
+def forget_selfrole_role(config_ids, role_id: int):
+    """Drop a deleted role from the cached roles and pending usage counts of the given configs."""
+    for config_id in config_ids:
+        selfrole_usage.forget(config_id, role_id)
+        found, roles = selfrole_roles_cache.lookup(config_id)
+        if roles:
+            roles.pop(role_id, None)
+
+async def clear_deleted_selfrole_channel(session, channel_id: int) -> set:
+    """
+    Forget the self-role menus posted in a deleted channel, in the caller's
+    transaction. Returns the IDs of the configs that had a menu there.
+    """
+    result = await session.execute(
+        select(SelfRoleMessage.config_id).where(SelfRoleMessage.channel_id == channel_id)
+    )
+    config_ids = set(result.scalars().all())
+    if config_ids:
+        await session.execute(delete(SelfRoleMessage).where(SelfRoleMessage.channel_id == channel_id))
+    return config_ids
+
+async def clear_guild_selfrole_messages(session, guild_id: int):
+    """Forget every self-role menu posted in a guild, in the caller's transaction."""
+    await session.execute(delete(SelfRoleMessage).where(SelfRoleMessage.guild_id == guild_id))
+
+async def get_selfrole_messages(config_id: int) -> dict:
+    """Return {channel_id: message_id} of the posted menus of a self-role config."""
+    async with selfrole_session() as session:
+        result = await session.execute(
+            select(SelfRoleMessage.channel_id, SelfRoleMessage.message_id)
+            .where(SelfRoleMessage.config_id == config_id)
+        )
+        return dict(result.all())
+
+async def record_selfrole_message(config_id: int, guild_id: int, channel_id: int, message_id: int):
+    """Record the posted menu of a self-role config in a channel, replacing an older one."""
+    # One upsert, so concurrent deploys to the same channel cannot both insert
+    statement = insert(SelfRoleMessage).values(
+        config_id=config_id, guild_id=guild_id, channel_id=channel_id, message_id=message_id
+    )
+    async with selfrole_session() as session:
+        await session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["config_id", "channel_id"],
+                set_={"message_id": statement.excluded.message_id},
+            )
+        )
+        await session.commit()
+
+async def delete_selfrole_messages(config_id: int, channel_ids):
+    """Forget the posted menus of a self-role config in the given channels."""
+    async with selfrole_session() as session:
+        await session.execute(
+            delete(SelfRoleMessage).where(
+                SelfRoleMessage.config_id == config_id,
+                SelfRoleMessage.channel_id.in_(list(channel_ids)),
+            )
+        )
+        await session.commit()
+
+async def get_selfrole_config_by_id(config_id: int):
+    """Retrieve a self-role configuration by its ID."""
+    async with selfrole_session() as session:
+        result = await session.execute(
+            select(SelfRoleConfig).where(SelfRoleConfig.id == config_id)
+        )
+        return result.scalars().first()
+
+class SelfRoleUsageCounters:
+    """
+    In-memory self-role usage counters.
+
+    Menu clicks only bump a counter per (guild, config, role). The counters
+    are written every `flush_interval` seconds as one batched upsert into
+    selfrole_usage, so analytics add no database writes to the click path.
+    """
+
+    def __init__(self, flush_interval: float = 60.0):
+        self.flush_interval = flush_interval
+        self._counts = {}
+        self._task = None
+
+    def record(self, guild_id: int, config_id: int, role_id: int, added: bool):
+        """Count a role being added or removed through a menu."""
+        counts = self._counts.setdefault((guild_id, config_id, role_id), [0, 0])
+        counts[0 if added else 1] += 1
+
+    def pending(self, guild_id: int) -> dict:
+        """Return unflushed {(config_id, role_id): [adds, removes]} for a guild."""
+        return {
+            (config_id, role_id): counts
+            for (counts_guild_id, config_id, role_id), counts in self._counts.items()
+            if counts_guild_id == guild_id
+        }
+
+    def forget(self, config_id: int, role_id: int = None):
+        """Drop the unflushed counts of a deleted config, or of one of its roles."""
+        for key in [key for key in self._counts if key[1] == config_id and role_id in (None, key[2])]:
+            del self._counts[key]
+
+    def start(self):
+        """Start flushing periodically in the background, once per process."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def flush(self):
+        """
+        Write every pending counter in one transaction.
+
+        A counter is only written while its config still offers the role.
+        Counts of deleted configs and roles, and of roles that /set_selfroles
+        took out of a config since they were counted, are dropped.
+        """
+        if not self._counts:
+            return
+        counts, self._counts = self._counts, {}
+        rows = [
+            {"guild_id": guild_id, "config_id": config_id, "role_id": role_id, "adds": adds, "removes": removes}
+            for (guild_id, config_id, role_id), (adds, removes) in counts.items()
+        ]
+        # Deleting a config or role can finish while this flush is in flight,
+        # so each row is only written while its config still offers the role
+        option_exists = exists().where(
+            SelfRoleOption.config_id == bindparam("config_id"),
+            SelfRoleOption.role_id == bindparam("role_id"),
+        )
+        columns = ["guild_id", "config_id", "role_id", "adds", "removes"]
+        statement = insert(SelfRoleUsage).from_select(
+            columns,
+            select(*[bindparam(column) for column in columns]).where(option_exists),
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=["config_id", "role_id"],
+            set_={
+                "adds": SelfRoleUsage.adds + statement.excluded.adds,
+                "removes": SelfRoleUsage.removes + statement.excluded.removes,
+            },
+        )
+        try:
+            async with selfrole_engine.begin() as conn:
+                await conn.execute(statement, rows)
+        except Exception as e:
+            # Put the counts back so the next flush writes them
+            for key, (adds, removes) in counts.items():
+                pending = self._counts.setdefault(key, [0, 0])
+                pending[0] += adds
+                pending[1] += removes
+            print(f"SelfRoles: Failed to flush usage counters: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+# Shared usage counters for every self-role menu
+selfrole_usage = SelfRoleUsageCounters()
+
+async def get_selfrole_usage(guild_id: int) -> list:
+    """Return (config_id, role_id, adds, removes) rows of a guild, including unflushed counts."""
+    async with selfrole_session() as session:
+        result = await session.execute(
+            select(SelfRoleUsage.config_id, SelfRoleUsage.role_id, SelfRoleUsage.adds, SelfRoleUsage.removes)
+            .where(SelfRoleUsage.guild_id == guild_id)
+        )
+        usage = {(config_id, role_id): [adds, removes] for config_id, role_id, adds, removes in result.all()}
+
+    for key, (adds, removes) in selfrole_usage.pending(guild_id).items():
+        counts = usage.setdefault(key, [0, 0])
+        counts[0] += adds
+        counts[1] += removes
+    return [(config_id, role_id, adds, removes) for (config_id, role_id), (adds, removes) in usage.items()]
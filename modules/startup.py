@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+class ReadinessManager:
+    """
+    Idempotent handling of on_ready.
+
+    on_ready fires again every time the gateway session is re-established.
+    Cogs register their heavy startup work with `add_phase`. The phases run
+    once, on the first ready of the process, concurrently and each timed.
+    Later readies are only counted: persistent views and dynamic items stay
+    registered across reconnects, and the caches are kept up to date by
+    gateway events.
+    """
+
+    def __init__(self):
+        self.phases = []
+        self.timings = {}
+        self.total_seconds = None
+        self.started = False
+        self.ready_events = 0
+        self.reconnects = 0
+        self.resumes = 0
+        self.last_ready = None
+
+    def add_phase(self, name: str, func):
+        """
+        Register startup work.
+
+        Args:
+            name (str): Name used in timings and logs.
+            func: Coroutine function run on the first ready.
+        """
+        self.phases.append((name, func))
+
+    async def on_ready(self):
+        """Run the startup phases on the first ready, and only count later readies."""
+        self.ready_events += 1
+        self.last_ready = time.time()
+
+        if self.started:
+            self.reconnects += 1
+            print(f"Startup: reconnect #{self.reconnects}, startup phases already done")
+            return
+
+        self.started = True
+        start = time.perf_counter()
+        await asyncio.gather(*(self._run_phase(name, func) for name, func in self.phases))
+        self.total_seconds = time.perf_counter() - start
+
+        phases = ", ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in self.timings.items())
+        print(f"Startup: completed in {self.total_seconds * 1000:.1f}ms ({phases})")
+
+    def on_resumed(self):
+        """Count a resumed gateway session (no ready event, nothing to redo)."""
+        self.resumes += 1
+
+    async def _run_phase(self, name: str, func):
+        start = time.perf_counter()
+        try:
+            await func()
+        except Exception as e:
+            print(f"Startup: phase {name} failed: {e}")
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+# Shared readiness manager that cogs register their startup phases on
+readiness = ReadinessManager()
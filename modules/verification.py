@@ -1,31 +1,61 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import declarative_base
 from sqlalchemy.future import select
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, BigInteger, Date
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, BigInteger, Date, Index, MetaData, Table, delete, text
+from sqlalchemy.dialects.sqlite import insert
+from modules.database import get_engine, get_sessionmaker, import_legacy_database
+from modules.cache import GuildCache, GuildMemberSet
 import datetime
-import os
-
-# Ensure the database folder exists
-DATABASE_FOLDER = "database"
-os.makedirs(DATABASE_FOLDER, exist_ok=True)
-
-DATABASE_URL = f"sqlite+aiosqlite:///{DATABASE_FOLDER}/verification.db"
+import asyncio
 
 # Create the async engine and session
-engine = create_async_engine(DATABASE_URL, echo=True)
-async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+engine = get_engine("verification")
+async_session = get_sessionmaker("verification")
 
 Base = declarative_base()
 
+# Write-through cache of guild configurations, warm-loaded at startup
+config_cache = GuildCache("verification_configs")
+
+# Verified (guild_id, user_id) pairs, warm-loaded at startup so "already
+# verified" checks on the Verify button never touch the database
+verified_users = GuildMemberSet("verified_users")
+
+# Records from the old global verifications table are kept under this guild
+# ID: they were verified before records were scoped per guild, so they still
+# count as verified in every guild.
+LEGACY_GUILD_ID = 0
+
+# Progress of copying the old global table into guild_verifications
+backfill_state = {"done": False, "copied": 0, "last_id": 0}
+
 class Verification(Base):
-    __tablename__ = "verifications"
+    __tablename__ = "guild_verifications"
     id = Column(Integer, primary_key=True)
-    user_id = Column(String, unique=True, nullable=False)
+    guild_id = Column(BigInteger, nullable=False)
+    user_id = Column(BigInteger, nullable=False)
     username = Column(String, nullable=False)
     verified = Column(Boolean, default=False)
     timestamp = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
     birthdate = Column(Date, nullable=True)  # Added birthdate column
 
+    __table_args__ = (
+        Index("ix_guild_verifications_guild_user", "guild_id", "user_id", unique=True),
+    )
+
+# The old global table, keyed by a string user_id. It is only read by the
+# backfill and renamed to verifications_migrated once it has been copied.
+legacy_metadata = MetaData()
+legacy_verifications = Table(
+    "verifications",
+    legacy_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", String, unique=True, nullable=False),
+    Column("username", String, nullable=False),
+    Column("verified", Boolean, default=False),
+    Column("timestamp", DateTime),
+    Column("birthdate", Date, nullable=True),
+)
+
 class Config(Base):
     __tablename__ = "configs"
     id = Column(Integer, primary_key=True)
@@ -34,19 +64,56 @@ class Config(Base):
     log_channel_id = Column(BigInteger, nullable=True)
     verified_role_id = Column(BigInteger, nullable=True)
 
-    
+
+class VerificationMessage(Base):
+    __tablename__ = "verification_messages"
+    id = Column(Integer, primary_key=True)
+    guild_id = Column(BigInteger, nullable=False)
+    channel_id = Column(BigInteger, nullable=False)
+    message_id = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        # One verification message per channel; a newer post replaces the record
+        Index("ix_verification_messages_guild_channel", "guild_id", "channel_id", unique=True),
+    )
+
 async def init_db():
     """Initialize the database."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    await import_legacy_database("verification", Base.metadata, legacy_metadata)
+
+    # Records still in the old global table are copied by backfill_legacy_verifications
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'verifications'")
+        )
+        backfill_state["done"] = result.first() is None
+
+async def load_config_cache():
+    """Load every guild configuration into the in-memory cache."""
+    async with async_session() as session:
+        result = await session.execute(select(Config))
+        config_cache.load(result.scalars().all())
 
 async def get_config(guild_id: int):
     """Retrieve the configuration for a guild."""
+    found, config = config_cache.lookup(guild_id)
+    if found:
+        return config
+
     async with async_session() as session:
         result = await session.execute(
             select(Config).where(Config.guild_id == guild_id)
         )
-        return result.scalars().first()
+        config = result.scalars().first()
+    if config:
+        config_cache.set(guild_id, config)
+    return config
+
+def get_all_configs() -> list:
+    """Return every guild configuration from the warm-loaded cache."""
+    return config_cache.values()
 
 async def set_config(guild_id: int, verification_channel_id: int, log_channel_id: int, verified_role_id: int):
     """Set or update the configuration for a guild."""
@@ -75,10 +142,14 @@ async def set_config(guild_id: int, verification_channel_id: int, log_channel_id
         # Commit the changes to the database
         await session.commit()
 
-async def add_user_verification(user_id: str, username: str, birthdate: datetime.date):
-    """Add a new user verification record."""
+    # Keep the cache in step with the committed row
+    config_cache.set(guild_id, config)
+
+async def add_user_verification(guild_id: int, user_id: int, username: str, birthdate: datetime.date):
+    """Add a new user verification record for a guild."""
     async with async_session() as session:
         new_verification = Verification(
+            guild_id=guild_id,
             user_id=user_id,
             username=username,
             verified=True,
@@ -88,21 +159,250 @@ async def add_user_verification(user_id: str, username: str, birthdate: datetime
         session.add(new_verification)
         await session.commit()
 
-async def get_user_verification(user_id: str):
-    """Retrieve a user's verification record."""
+    verified_users.add(guild_id, user_id)
+
+async def get_user_verification(guild_id: int, user_id: int):
+    """Retrieve a user's verification record for a guild, falling back to a legacy global record."""
     async with async_session() as session:
         result = await session.execute(
-            select(Verification).where(Verification.user_id == user_id)
+            select(Verification)
+            .where(Verification.guild_id.in_((guild_id, LEGACY_GUILD_ID)))
+            .where(Verification.user_id == user_id)
+            .order_by(Verification.guild_id.desc())  # Prefer the guild's own record
         )
-        return result.scalars().first()
+        verification = result.scalars().first()
+        if verification or backfill_state["done"]:
+            return verification
+
+        # Not backfilled yet: the record may still only exist in the old table
+        result = await session.execute(
+            select(legacy_verifications).where(legacy_verifications.c.user_id == str(user_id))
+        )
+        row = result.first()
+        if row:
+            return Verification(
+                guild_id=LEGACY_GUILD_ID,
+                user_id=int(row.user_id),
+                username=row.username,
+                verified=row.verified,
+                timestamp=row.timestamp,
+                birthdate=row.birthdate,
+            )
+        return None
 
-async def clear_user_verification(user_id: str):
-    """Clear a user's verification record."""
+async def load_verified_users():
+    """Load every verified (guild_id, user_id) pair into the in-memory set."""
+    async with async_session() as session:
+        result = await session.execute(select(Verification.guild_id, Verification.user_id))
+        pairs = result.all()
+        if not backfill_state["done"]:
+            result = await session.execute(select(legacy_verifications.c.user_id))
+            pairs += [(LEGACY_GUILD_ID, user_id) for user_id in result.scalars().all()]
+    verified_users.load(pairs)
+
+async def is_user_verified(guild_id: int, user_id: int) -> bool:
+    """Check whether a user is verified in a guild."""
+    found, verified = verified_users.lookup((guild_id, LEGACY_GUILD_ID), user_id)
+    if found:
+        return verified
+    return await get_user_verification(guild_id, user_id) is not None
+
+async def clear_user_verification(guild_id: int, user_id: int):
+    """
+    Clear a user's verification record for a guild.
+    Returns True if a record was removed.
+
+    A legacy global record counts in every guild, so it is split into
+    guild-scoped copies for every other configured guild first, keeping the
+    user verified there, and then removed with the guild's own record.
+    """
     async with async_session() as session:
         result = await session.execute(
-            select(Verification).where(Verification.user_id == user_id)
+            select(Verification)
+            .where(Verification.guild_id == LEGACY_GUILD_ID)
+            .where(Verification.user_id == user_id)
         )
-        verification = result.scalars().first()
-        if verification:
-            await session.delete(verification)
-            await session.commit()
\ No newline at end of file
+        legacy = result.scalars().first()
+        if legacy is None and not backfill_state["done"]:
+            # Not backfilled yet: the record may still only exist in the old table
+            result = await session.execute(
+                select(legacy_verifications).where(legacy_verifications.c.user_id == str(user_id))
+            )
+            legacy = result.first()
+
+        other_guilds = []
+        if legacy:
+            result = await session.execute(select(Config.guild_id).where(Config.guild_id != guild_id))
+            other_guilds = result.scalars().all()
+            if other_guilds:
+                await session.execute(
+                    insert(Verification.__table__).prefix_with("OR IGNORE"),
+                    [
+                        {
+                            "guild_id": other_guild_id,
+                            "user_id": user_id,
+                            "username": legacy.username,
+                            "verified": legacy.verified,
+                            "timestamp": legacy.timestamp,
+                            "birthdate": legacy.birthdate,
+                        }
+                        for other_guild_id in other_guilds
+                    ],
+                )
+            # The backfill may have copied the record in the meantime, so clear both places
+            await session.execute(
+                delete(Verification)
+                .where(Verification.guild_id == LEGACY_GUILD_ID)
+                .where(Verification.user_id == user_id)
+            )
+            if not backfill_state["done"]:
+                await session.execute(
+                    delete(legacy_verifications).where(legacy_verifications.c.user_id == str(user_id))
+                )
+
+        result = await session.execute(
+            delete(Verification)
+            .where(Verification.guild_id == guild_id)
+            .where(Verification.user_id == user_id)
+        )
+        removed = result.rowcount + (1 if legacy else 0)
+        await session.commit()
+
+    verified_users.discard(guild_id, user_id)
+    verified_users.discard(LEGACY_GUILD_ID, user_id)
+    for other_guild_id in other_guilds:
+        verified_users.add(other_guild_id, user_id)
+    return removed > 0
+
+async def backfill_legacy_verifications(batch_size: int = 5000):
+    """
+    Copy records from the old global verifications table into
+    guild_verifications under LEGACY_GUILD_ID.
+
+    Rows are copied in id ranges of `batch_size`, each in its own short
+    transaction, yielding to the event loop in between so the bot keeps
+    serving interactions on large databases. Safe to interrupt: copied rows
+    are skipped by the unique index when the backfill resumes.
+    """
+    if backfill_state["done"]:
+        return
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM verifications"))
+        max_id = result.scalar()
+
+    print(f"Verification: Backfilling legacy verification records up to id {max_id}")
+    last_id = backfill_state["last_id"]
+    while last_id < max_id:
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                text(
+                    "INSERT OR IGNORE INTO guild_verifications (guild_id, user_id, username, verified, timestamp, birthdate) "
+                    "SELECT :guild_id, CAST(user_id AS INTEGER), username, verified, timestamp, birthdate "
+                    "FROM verifications WHERE id > :last_id AND id <= :next_id"
+                ),
+                {"guild_id": LEGACY_GUILD_ID, "last_id": last_id, "next_id": last_id + batch_size},
+            )
+            backfill_state["copied"] += result.rowcount
+        last_id += batch_size
+        backfill_state["last_id"] = last_id
+        await asyncio.sleep(0)
+
+    async with engine.begin() as conn:
+        # Everything is copied; keep the old table around under a new name
+        await conn.execute(text("ALTER TABLE verifications RENAME TO verifications_migrated"))
+    backfill_state["done"] = True
+    print(f"Verification: Backfill complete, {backfill_state['copied']} legacy records copied")
+
+backfill_task = None
+
+def start_legacy_backfill():
+    """Run backfill_legacy_verifications in the background, once per process."""
+    global backfill_task
+    if backfill_task is None and not backfill_state["done"]:
+        backfill_task = asyncio.create_task(backfill_legacy_verifications())
+        backfill_task.add_done_callback(_backfill_finished)
+    return backfill_task
+
+# Seconds to wait before resuming a failed backfill
+BACKFILL_RETRY_DELAY = 60
+
+def _backfill_finished(task: asyncio.Task):
+    global backfill_task
+    if task.cancelled() or task.exception() is None:
+        return
+    # Legacy lookups stay on until the backfill completes, so resume it from
+    # the last committed batch instead of losing the error with the task
+    print(f"Verification: Backfill failed after {backfill_state['copied']} records, retrying in {BACKFILL_RETRY_DELAY}s: {task.exception()}")
+    backfill_task = None
+    asyncio.get_running_loop().call_later(BACKFILL_RETRY_DELAY, start_legacy_backfill)
+
+async def record_verification_message(guild_id: int, channel_id: int, message_id: int):
+    """Record a posted verification message, replacing an older one in the same channel."""
+    # One upsert, so concurrent posts to the same channel cannot both insert
+    statement = insert(VerificationMessage).values(guild_id=guild_id, channel_id=channel_id, message_id=message_id)
+    async with async_session() as session:
+        await session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["guild_id", "channel_id"],
+                set_={"message_id": statement.excluded.message_id},
+            )
+        )
+        await session.commit()
+
+async def get_verification_messages(guild_id: int) -> dict:
+    """Return {channel_id: message_id} of the posted verification messages of a guild."""
+    async with async_session() as session:
+        result = await session.execute(
+            select(VerificationMessage.channel_id, VerificationMessage.message_id)
+            .where(VerificationMessage.guild_id == guild_id)
+        )
+        return dict(result.all())
+
+async def delete_verification_messages(guild_id: int, channel_ids):
+    """Forget the posted verification messages of a guild in the given channels."""
+    async with async_session() as session:
+        await session.execute(
+            delete(VerificationMessage).where(
+                VerificationMessage.guild_id == guild_id,
+                VerificationMessage.channel_id.in_(list(channel_ids)),
+            )
+        )
+        await session.commit()
+
+async def clear_deleted_role(session, guild_id: int, role_id: int):
+    """
+    Unset a deleted verified role in the caller's transaction.
+    Returns the changed configuration, or None.
+    """
+    result = await session.execute(
+        select(Config).where(Config.guild_id == guild_id, Config.verified_role_id == role_id)
+    )
+    config = result.scalars().first()
+    if config:
+        config.verified_role_id = None
+    return config
+
+async def clear_deleted_channel(session, guild_id: int, channel_id: int):
+    """
+    Unset a deleted channel and forget the verification messages posted in it,
+    in the caller's transaction. Returns the changed configuration, or None.
+    """
+    await session.execute(
+        delete(VerificationMessage).where(
+            VerificationMessage.guild_id == guild_id,
+            VerificationMessage.channel_id == channel_id,
+        )
+    )
+    result = await session.execute(select(Config).where(Config.guild_id == guild_id))
+    config = result.scalars().first()
+    if not config or channel_id not in (config.verification_channel_id, config.log_channel_id):
+        return None
+    if config.verification_channel_id == channel_id:
+        config.verification_channel_id = None
+    if config.log_channel_id == channel_id:
+        config.log_channel_id = None
+    return config
+
+async def clear_guild_messages(session, guild_id: int):
+    """Forget every verification message posted in a guild, in the caller's transaction."""
+    await session.execute(delete(VerificationMessage).where(VerificationMessage.guild_id == guild_id))
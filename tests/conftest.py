@@ -0,0 +1,26 @@
+import subprocess
+import sys
+import os
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def run_bot_code(tmp_path):
+    """
+    Run code in a fresh interpreter with the bot's modules, inside tmp_path.
+
+    The database modules pick their files and settings at import time, so
+    every run gets its own process and bot folder.
+    """
+    def run(code: str) -> str:
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=tmp_path,
+            env={**os.environ, "PYTHONPATH": REPO_ROOT},
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        return result.stdout
+    return run
@@ -0,0 +1,13 @@
+from modules.cache import GuildCache
+
+def test_discard_guild_drops_tuple_keyed_entries_of_that_guild_only():
+    cache = GuildCache("resolved_selfroles")
+    cache.set((1, "colors"), "a")
+    cache.set((1, "games"), "b")
+    cache.set((2, "colors"), "c")
+
+    cache.discard_guild(1)
+
+    assert cache.lookup((1, "colors")) == (False, None)
+    assert cache.lookup((2, "colors")) == (True, "c")
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,47 @@
+import datetime
+from modules.moderation_db import EscalationLadder, EscalationRule, DEFAULT_ESCALATION_RULES
+
+LADDER = EscalationLadder(1, [
+    EscalationRule(threshold=2, action="timeout", window_hours=None, duration_minutes=10),
+    EscalationRule(threshold=4, action="kick", window_hours=None, duration_minutes=None),
+    EscalationRule(threshold=6, action="ban", window_hours=None, duration_minutes=None),
+])
+
+def test_lower_steps_fire_once():
+    assert LADDER.match({None: 2}).action == "timeout"
+    assert LADDER.match({None: 3}) is None
+    assert LADDER.match({None: 4}).action == "kick"
+    assert LADDER.match({None: 5}) is None
+
+def test_top_step_applies_above_its_threshold():
+    assert LADDER.match({None: 6}).action == "ban"
+    assert LADDER.match({None: 9}).action == "ban"
+
+def test_default_ladder_bans_at_three_or_more():
+    ladder = EscalationLadder(1, DEFAULT_ESCALATION_RULES)
+    assert ladder.match({None: 2}) is None
+    assert ladder.match({None: 3}).action == "ban"
+    assert ladder.match({None: 4}).action == "ban"
+
+def test_most_severe_step_repeats_when_thresholds_are_not_in_severity_order():
+    ladder = EscalationLadder(1, [
+        EscalationRule(threshold=3, action="ban", window_hours=None, duration_minutes=None),
+        EscalationRule(threshold=5, action="timeout", window_hours=None, duration_minutes=10),
+    ])
+    assert ladder.limit == 3
+    assert ladder.match({None: 3}).action == "ban"
+    # A ban that failed at 3 is retried, and a timeout never replaces it
+    assert ladder.match({None: 4}).action == "ban"
+    assert ladder.match({None: 6}).action == "ban"
+
+def test_removing_a_warning_outside_a_window_leaves_that_window_alone():
+    ladder = EscalationLadder(1, [
+        EscalationRule(threshold=2, action="timeout", window_hours=24, duration_minutes=10),
+        EscalationRule(threshold=5, action="ban", window_hours=None, duration_minutes=None),
+    ])
+    counts = {None: 4, 24: 2}
+    now = datetime.datetime.now(datetime.timezone.utc)
+    assert ladder.without_warning(counts, now - datetime.timedelta(days=3)) == {None: 3, 24: 2}
+    assert ladder.without_warning(counts, now - datetime.timedelta(hours=1)) == {None: 3, 24: 1}
+    # The timeout step stays reached when the removed warning is older than its window
+    assert ladder.reached(ladder.without_warning(counts, now - datetime.timedelta(days=3))).action == "timeout"
@@ -0,0 +1,25 @@
+import asyncio
+from modules.keyed_queue import KeyedQueue
+
+def test_items_queued_while_a_worker_runs_are_handled_in_order():
+    handled = []
+
+    async def scenario():
+        async def handle(key, queue):
+            item = queue.pop(0)
+            handled.append((key, item))
+            if (key, item) == ("a", 1):
+                # Queued while the worker is busy, picked up by the same worker
+                workers.put("a", 3)
+            await asyncio.sleep(0)
+
+        workers = KeyedQueue(handle)
+        workers.put("a", 1)
+        workers.put("a", 2)
+        workers.put("b", 1)
+        await workers.join()
+        return workers.pending("a")
+
+    assert asyncio.run(scenario()) == []
+    assert [item for key, item in handled if key == "a"] == [1, 2, 3]
+    assert [item for key, item in handled if key == "b"] == [1]
@@ -0,0 +1,128 @@
+import sqlite3
+
+# Schemas created by the bot before the per-module databases were migrated
+BASELINE_MODERATION_SCHEMA = """
+CREATE TABLE moderation_configs (
+    id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+    guild_id BIGINT NOT NULL,
+    log_channel_id BIGINT,
+    audit_logging_enabled BOOLEAN NOT NULL,
+    UNIQUE (guild_id)
+);
+CREATE TABLE warnings (
+    id INTEGER NOT NULL,
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    moderator_id BIGINT NOT NULL,
+    reason VARCHAR NOT NULL,
+    timestamp DATETIME,
+    PRIMARY KEY (id)
+);
+CREATE TABLE appeals (
+    id INTEGER NOT NULL,
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    ban_reason VARCHAR NOT NULL,
+    appeal_reason VARCHAR NOT NULL,
+    status VARCHAR NOT NULL,
+    moderator_id BIGINT,
+    moderator_response VARCHAR,
+    timestamp DATETIME,
+    message_id BIGINT,
+    PRIMARY KEY (id)
+);
+"""
+
+BASELINE_SELFROLE_SCHEMA = """
+CREATE TABLE selfrole_configs (
+    id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+    guild_id BIGINT NOT NULL,
+    message_name VARCHAR NOT NULL,
+    roles_and_labels VARCHAR NOT NULL,
+    button_color VARCHAR NOT NULL,
+    embed_title VARCHAR NOT NULL,
+    embed_description VARCHAR NOT NULL
+);
+"""
+
+def seed(path, schema, statements):
+    conn = sqlite3.connect(path)
+    conn.executescript(schema)
+    for statement in statements:
+        conn.execute(statement)
+    conn.commit()
+    conn.close()
+
+def make_unified_bot(tmp_path):
+    """Lay out a bot folder in tmp_path with unified storage enabled."""
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "config.yml").write_text("DATABASE:\n  unified: true\n")
+    (tmp_path / "database").mkdir()
+    return tmp_path / "database"
+
+def test_unified_mode_imports_baseline_moderation_database(tmp_path, run_bot_code):
+    database = make_unified_bot(tmp_path)
+    seed(database / "moderation.db", BASELINE_MODERATION_SCHEMA, [
+        "INSERT INTO moderation_configs (guild_id, log_channel_id, audit_logging_enabled) VALUES (1, 10, 1)",
+        "INSERT INTO warnings (guild_id, user_id, moderator_id, reason, timestamp) VALUES (1, 100, 5, 'spam', '2024-01-01 00:00:00')",
+        "INSERT INTO warnings (guild_id, user_id, moderator_id, reason, timestamp) VALUES (1, 100, 5, 'spam', '2024-01-02 00:00:00')",
+    ])
+
+    run_bot_code((
+        "import asyncio\n"
+        "from modules.moderation_db import init_moderation_db\n"
+        "asyncio.run(init_moderation_db())\n"
+    ))
+
+    assert (database / "moderation.db.imported").exists()
+    conn = sqlite3.connect(database / "bot.db")
+    assert conn.execute("SELECT COUNT(*) FROM warnings WHERE expired = 0").fetchone() == (2,)
+    assert conn.execute("SELECT active_count FROM warning_counts WHERE guild_id = 1 AND user_id = 100").fetchone() == (2,)
+    conn.close()
+
+def test_unified_mode_imports_baseline_selfrole_database(tmp_path, run_bot_code):
+    database = make_unified_bot(tmp_path)
+    seed(database / "selfroles.db", BASELINE_SELFROLE_SCHEMA, [
+        "INSERT INTO selfrole_configs (guild_id, message_name, roles_and_labels, button_color, embed_title, embed_description) "
+        """VALUES (1, 'colors', '{"200": "Red", "201": "Blue"}', 'primary', 'Roles', 'Pick one')""",
+    ])
+
+    run_bot_code((
+        "import asyncio\n"
+        "from modules.selfroles_db import init_selfrole_db\n"
+        "asyncio.run(init_selfrole_db())\n"
+    ))
+
+    assert (database / "selfroles.db.imported").exists()
+    conn = sqlite3.connect(database / "bot.db")
+    assert conn.execute("SELECT multi_select FROM selfrole_configs").fetchone() == (0,)
+    assert conn.execute("SELECT role_id, label FROM selfrole_options ORDER BY position").fetchall() == [(200, "Red"), (201, "Blue")]
+    conn.close()
+
+def test_unified_mode_keeps_imported_warning_counts(tmp_path, run_bot_code):
+    # A per-module moderation.db that is fully migrated, with one expired warning
+    run_bot_code((
+        "import asyncio\n"
+        "from modules.moderation_db import *\n"
+        "async def main():\n"
+        "    await init_moderation_db()\n"
+        "    for _ in range(3):\n"
+        "        await add_warning(1, 100, 5, 'spam')\n"
+        "    async with moderation_session() as session:\n"
+        "        await session.execute(update(ModWarning).where(ModWarning.id == 1).values(expired=True))\n"
+        "        await change_warning_count(session, 1, 100, -1)\n"
+        "        await session.commit()\n"
+        "asyncio.run(main())\n"
+    ))
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "config.yml").write_text("DATABASE:\n  unified: true\n")
+
+    run_bot_code((
+        "import asyncio\n"
+        "from modules.moderation_db import init_moderation_db\n"
+        "asyncio.run(init_moderation_db())\n"
+    ))
+
+    conn = sqlite3.connect(tmp_path / "database" / "bot.db")
+    assert conn.execute("SELECT active_count FROM warning_counts WHERE guild_id = 1 AND user_id = 100").fetchone() == (2,)
+    conn.close()
@@ -0,0 +1,84 @@
+import asyncio
+from modules.role_mutations import RoleMutationCoalescer
+
+class FakeRole:
+    def __init__(self, role_id: int):
+        self.id = role_id
+
+class FakeGuild:
+    """Holds the member's roles as Discord has them and records every request."""
+
+    def __init__(self, role_ids):
+        self.id = 1
+        self.role_ids = list(role_ids)
+        self.requests = []
+
+        self.cached = None
+
+    def get_member(self, member_id: int):
+        # The gateway cache, which lags behind the bot's own requests
+        return self.cached
+
+class FakeMember:
+    """A member object whose roles are a snapshot taken when it was built."""
+
+    def __init__(self, guild: FakeGuild, role_ids):
+        self.id = 100
+        self.guild = guild
+        self.roles = [FakeRole(0)] + [FakeRole(role_id) for role_id in role_ids]  # @everyone first
+
+    async def add_roles(self, role):
+        self.guild.requests.append(("add", role.id))
+        if role.id not in self.guild.role_ids:
+            self.guild.role_ids.append(role.id)
+
+    async def remove_roles(self, role):
+        self.guild.requests.append(("remove", role.id))
+        self.guild.role_ids.remove(role.id)
+
+    async def edit(self, roles):
+        self.guild.requests.append(("edit", sorted(role.id for role in roles)))
+        self.guild.role_ids = [role.id for role in roles]
+
+def test_later_changes_on_a_stale_member_keep_earlier_ones():
+    async def scenario():
+        coalescer = RoleMutationCoalescer(window=0)
+        guild = FakeGuild([1])
+        member = FakeMember(guild, [1])  # Never refreshed, like a cached interaction user
+        await coalescer.apply(member, add=[FakeRole(2), FakeRole(3)], remove=[FakeRole(1)])
+        await coalescer.apply(member, add=[FakeRole(4)])
+        return guild
+
+    guild = asyncio.run(scenario())
+    assert sorted(guild.role_ids) == [2, 3, 4]
+    assert guild.requests == [("edit", [2, 3]), ("add", 4)]
+
+def test_batches_build_on_a_lagging_cache_with_one_request_each():
+    async def scenario():
+        coalescer = RoleMutationCoalescer(window=0)
+        guild = FakeGuild([1, 9])
+        guild.cached = FakeMember(guild, [1, 9])  # No gateway update arrives meanwhile
+        await coalescer.apply(guild.cached, add=[FakeRole(2), FakeRole(3)], remove=[FakeRole(1)])
+        await coalescer.apply(guild.cached, add=[FakeRole(4), FakeRole(5)])
+        return guild
+
+    guild = asyncio.run(scenario())
+    assert guild.requests == [("edit", [2, 3, 9]), ("edit", [2, 3, 4, 5, 9])]
+
+def test_a_multi_select_change_is_one_request():
+    async def scenario(start, target):
+        coalescer = RoleMutationCoalescer(window=0)
+        guild = FakeGuild(start)
+        guild.cached = FakeMember(guild, start)
+        await coalescer.apply(
+            guild.cached,
+            add=[FakeRole(role_id) for role_id in target - set(start)],
+            remove=[FakeRole(role_id) for role_id in set(start) - target],
+        )
+        return guild
+
+    # Pick 5 of 25, swap 5 for 5, pick 20 of 25
+    for start, target in [([], set(range(1, 6))), (list(range(1, 6)), set(range(6, 11))), ([], set(range(1, 21)))]:
+        guild = asyncio.run(scenario(start, target))
+        assert len(guild.requests) == 1
+        assert set(guild.role_ids) == target
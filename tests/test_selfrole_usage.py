@@ -0,0 +1,46 @@
+import sqlite3
+
+def test_flush_drops_counts_of_a_config_deleted_meanwhile(tmp_path, run_bot_code):
+    run_bot_code((
+        "import asyncio\n"
+        "from modules.selfroles_db import *\n"
+        "async def main():\n"
+        "    await init_selfrole_db()\n"
+        "    await set_selfrole_config(1, 'colors', {200: 'Red'}, 'primary', 'Roles', 'Pick one')\n"
+        "    await set_selfrole_config(1, 'games', {300: 'Chess'}, 'primary', 'Roles', 'Pick one')\n"
+        "    colors = await get_selfrole_config(1, 'colors')\n"
+        "    games = await get_selfrole_config(1, 'games')\n"
+        "    selfrole_usage.record(1, colors.id, 200, added=True)\n"
+        "    selfrole_usage.record(1, games.id, 300, added=True)\n"
+        "    # Deleted without forget(), as when a flush already holds the counts\n"
+        "    async with selfrole_session() as session:\n"
+        "        await session.execute(delete(SelfRoleOption).where(SelfRoleOption.config_id == colors.id))\n"
+        "        await session.execute(delete(SelfRoleConfig).where(SelfRoleConfig.id == colors.id))\n"
+        "        await session.commit()\n"
+        "    await selfrole_usage.flush()\n"
+        "asyncio.run(main())\n"
+    ))
+
+    conn = sqlite3.connect(tmp_path / "database" / "selfroles.db")
+    assert conn.execute("SELECT role_id, adds FROM selfrole_usage").fetchall() == [(300, 1)]
+    conn.close()
+
+def test_flush_drops_counts_of_roles_taken_out_of_a_config(tmp_path, run_bot_code):
+    run_bot_code((
+        "import asyncio\n"
+        "from modules.selfroles_db import *\n"
+        "async def main():\n"
+        "    await init_selfrole_db()\n"
+        "    await set_selfrole_config(1, 'colors', {200: 'Red', 201: 'Blue'}, 'primary', 'Roles', 'Pick one')\n"
+        "    colors = await get_selfrole_config(1, 'colors')\n"
+        "    selfrole_usage.record(1, colors.id, 200, added=True)\n"
+        "    selfrole_usage.record(1, colors.id, 201, added=True)\n"
+        "    # Red is taken out of the menu before the counts are flushed\n"
+        "    await set_selfrole_config(1, 'colors', {201: 'Blue'}, 'primary', 'Roles', 'Pick one')\n"
+        "    await selfrole_usage.flush()\n"
+        "asyncio.run(main())\n"
+    ))
+
+    conn = sqlite3.connect(tmp_path / "database" / "selfroles.db")
+    assert conn.execute("SELECT role_id, adds FROM selfrole_usage").fetchall() == [(201, 1)]
+    conn.close()
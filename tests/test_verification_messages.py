@@ -0,0 +1,15 @@
+import json
+
+def test_a_repost_replaces_the_channel_record(run_bot_code):
+    output = run_bot_code((
+        "import asyncio\n"
+        "import json\n"
+        "from modules.verification import *\n"
+        "async def main():\n"
+        "    await init_db()\n"
+        "    await record_verification_message(1, 10, 100)\n"
+        "    await asyncio.gather(record_verification_message(1, 10, 101), record_verification_message(1, 11, 200))\n"
+        "    print(json.dumps(await get_verification_messages(1)))\n"
+        "asyncio.run(main())\n"
+    ))
+    assert json.loads(output.strip().splitlines()[-1]) == {"10": 101, "11": 200}
@@ -0,0 +1,47 @@
+import json
+
+SETUP = """
+import asyncio
+import datetime
+import json
+from modules.moderation_db import *
+
+async def seed(guild_id, user_id, warnings, days_old):
+    await init_moderation_db()
+    timestamp = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days_old)
+    async with moderation_session() as session:
+        for _ in range(warnings):
+            session.add(ModWarning(guild_id=guild_id, user_id=user_id, moderator_id=5, reason="spam", timestamp=timestamp))
+        await change_warning_count(session, guild_id, user_id, warnings)
+        await session.commit()
+"""
+
+def run_scenario(run_bot_code, body: str):
+    """Run an async scenario after SETUP and return the JSON it prints."""
+    indented = "".join(f"    {line}\n" for line in body.strip().splitlines())
+    output = run_bot_code(f"{SETUP}\nasync def main():\n{indented}\nasyncio.run(main())\n")
+    return json.loads(output.strip().splitlines()[-1])
+
+def test_concurrent_expiry_counts_each_warning_once(run_bot_code):
+    result = run_scenario(run_bot_code, """
+await seed(1, 100, 30, days_old=10)
+results = await asyncio.gather(expire_warnings(1, 1, batch_size=10), expire_warnings(1, 1, batch_size=10))
+print(json.dumps({"expired": sum(results), "count": await get_active_warning_count(1, 100)}))
+""")
+    assert result == {"expired": 30, "count": 0}
+
+def test_bulk_clear_racing_expiry_counts_each_warning_once(run_bot_code):
+    result = run_scenario(run_bot_code, """
+await seed(1, 100, 30, days_old=10)
+cleared, expired = await asyncio.gather(clear_warnings_bulk(1, batch_size=10), expire_warnings(1, 1, batch_size=10))
+print(json.dumps({"cleared": sum(cleared), "count": await get_active_warning_count(1, 100)}))
+""")
+    assert result == {"cleared": 30, "count": 0}
+
+def test_removal_racing_expiry_counts_each_warning_once(run_bot_code):
+    result = run_scenario(run_bot_code, """
+await seed(1, 100, 30, days_old=10)
+await asyncio.gather(expire_warnings(1, 1, batch_size=5), *[remove_warning(warning_id) for warning_id in range(1, 31)])
+print(json.dumps({"count": await get_active_warning_count(1, 100)}))
+""")
+    assert result == {"count": 0}